@@ -1,87 +1,327 @@
-import json
+import asyncio
+import bisect
 import logging
-from json.decoder import JSONDecoder
+import numpy as np
+from collections import deque
+from typing import AsyncIterator, Optional, Tuple
+from config import config
 from models.schemas import Schema
 from utils.gemini_model import GeminiModel
+from utils.value_synthesizer import LocalValueSynthesizer
+from utils.amplifier import SeedAmplifier
+from utils.chunk_sizing import AdaptiveChunkSizer
+from utils.json_salvage import salvage_json_array
+from utils.record_validator import RecordValidator
+from utils.checkpoint import CheckpointStore, SEED_SET_OFFSET, checkpoint_store
+from utils.metrics import record_retry
+from utils.retry import RetryPolicy, classify
+from utils.prompt_builder import ChunkPrompt
+from utils.uniqueness import UniquenessIndex, unique_fields
 
 logger = logging.getLogger(__name__)
 
 class DataGeneratorAgent:
-    def __init__(self):
-        self.retry_limit = 2
-        self.chunk_size = 20  # max records per Gemini call to avoid truncation
+    def __init__(self, max_concurrency: int = config.MAX_CONCURRENT_CHUNKS, model=GeminiModel,
+                 local_synthesis: bool = config.LOCAL_SYNTHESIS, seed: Optional[int] = config.GENERATION_SEED,
+                 amplify_above: Optional[int] = config.AMPLIFY_ABOVE_ROWS, amplify_seed_rows: int = config.AMPLIFY_SEED_ROWS,
+                 checkpoints: Optional[CheckpointStore] = checkpoint_store):
+        self.retry_limit = 2  # consecutive unusable replies per chunk
+        self.retry = RetryPolicy()  # transport retries with backoff, per call
+        self.chunk_size = 20  # starting records per Gemini call; adapted per run when adaptive_chunking is on
+        self.max_output_tokens = config.CHUNK_MAX_OUTPUT_TOKENS
+        self.adaptive_chunking = config.ADAPTIVE_CHUNKING
+        self.target_truncation_rate = config.TARGET_TRUNCATION_RATE
+        self.local_chunk_size = 5000  # records per chunk when no field needs the LLM
+        self.max_concurrency = max_concurrency  # max chunks in flight at once
+        self.model = model  # anything exposing GeminiModel.agenerate's signature
+        self.local_synthesis = local_synthesis  # fill rule-friendly columns without the LLM
+        self.seed = seed
+        self.amplify_above = amplify_above  # larger runs expand an LLM seed set locally, None disables
+        self.amplify_seed_rows = amplify_seed_rows
+        self.checkpoints = checkpoints  # completed chunks of runs given a run_id
+        self.last_run_stats: Optional[dict] = None  # chunk sizing stats of the most recent run
 
-    def generate(self, schema: Schema) -> list:
-        total = schema.sample_size
+    def generate(self, schema: Schema, run_id: Optional[str] = None, seed: Optional[int] = None) -> list:
+        """Blocking entry point for callers without a running event loop"""
+        return asyncio.run(self.agenerate(schema, run_id, seed))
+
+    async def agenerate(self, schema: Schema, run_id: Optional[str] = None, seed: Optional[int] = None) -> list:
+        """Generates all chunks concurrently and returns records in offset order"""
         all_data = []
+        async for chunk in self.astream(schema, run_id, seed):
+            all_data.extend(chunk)
+        return all_data
+
+    def deterministic(self) -> bool:
+        """Whether model responses are being recorded or replayed (GeminiModel.replay)"""
+        return getattr(self.model, "replay", None) is not None
+
+    async def astream(self, schema: Schema, run_id: Optional[str] = None,
+                      seed: Optional[int] = None) -> AsyncIterator[list]:
+        """
+        Yields chunks in offset order as soon as each one is ready.
+
+        At most max_concurrency chunks are in flight, and finished chunks are only
+        buffered until the ones before them complete, so memory stays O(window).
+
+        With a run_id, every LLM chunk is checkpointed as it completes; calling again
+        with the same run_id after a failure reuses them and only generates the gaps.
+        Checkpoints are dropped once the run has yielded everything.
+
+        While responses are recorded or replayed, chunks are planned deterministically
+        (fixed size, one call in flight) so each call maps to the same recording on
+        every run; with a seed the output is then identical run to run.
+        """
+        total = schema.sample_size
+        store = self.checkpoints if run_id else None
+        seed = seed if seed is not None else self.seed
+        deterministic = self.deterministic()
+        if store is not None:
+            if seed is None:
+                seed = int(np.random.SeedSequence().entropy % (2 ** 63))
+            seed = await asyncio.to_thread(store.open_run, run_id, schema, seed)
+        synth = LocalValueSynthesizer(schema, seed=seed) if self.local_synthesis else None
+        llm_fields = synth.llm_fields if synth else schema.fields
+        # Only columns that need the model are described to it
+        llm_schema = schema.model_copy(update={"fields": llm_fields}) if llm_fields else None
+        done = await asyncio.to_thread(store.load_chunks, run_id) if store is not None else {}
+        if done:
+            logger.info(f"[DataGenerator] Resuming run {run_id}: {len(done)} checkpointed chunk(s), "
+                        f"{sum(len(records) for records in done.values())} records")
 
-        for start in range(0, total, self.chunk_size):
-            chunk_count = min(self.chunk_size, total - start)
-
-            prompt = f"""
-            You are a JSON data generator for synthetic dataset creation.
-            Generate **realistic** and **domain-specific** synthetic records.
-
-            === SCHEMA ===
-            {schema.model_dump_json(indent=2)}
-
-            === RULES ===
-            - Generate exactly {chunk_count} records.
-            - Output only a **JSON array** of flat objects. Each object must strictly conform to the schema.
-            - Each record must include **all fields** from the schema. No missing or null values.
-            - Ensure strict type adherence: string, number, boolean, date (YYYY-MM-DD), datetime (ISO format).
-            - Use realistic and consistent values inferred from field names, types, and constraints.
-            - If a field represents a date, ensure the value is a valid and realistic date.
-            - Do **not** include markdown, headers, comments, or explanations.
-            - The output must be valid JSON and must start with `[` and end with `]`.
-
-            === EXAMPLE OUTPUT FORMAT ===
-            [
-            {{
-                "field_1": "value",
-                "field_2": 123,
-                ...
-            }},
-            ... (total {chunk_count} items)
-            ]
-            """
-           
-            for attempt in range(1, self.retry_limit + 1):
-                try:
-                    response = GeminiModel.generate(
-                        prompt,
-                        temperature=0.3,
-                        max_output_tokens=2000
-                    )
-
-                    cleaned = response.strip().replace("```json", "").replace("```", "").strip()
-                    # Try to fix common Gemini issues before decoding
-                    if cleaned.endswith(","):
-                        cleaned = cleaned[:-1] + "]"  # Fix for trailing comma
-                    if not cleaned.startswith("["):
-                        cleaned = "[" + cleaned
-                    if not cleaned.endswith("]"):
-                        cleaned += "]"
-                    if not cleaned:
-                        raise ValueError("Gemini returned empty response")
-
-                    data, idx = JSONDecoder().raw_decode(cleaned)
-
-                    if not isinstance(data, list):
-                        raise ValueError("Gemini output is not a JSON array")
-
-                    if len(data) != chunk_count:
-                        raise ValueError(f"Expected {chunk_count} records, got {len(data)}")
-
-                    logger.info(f"[DataGenerator] Successfully generated {len(data)} records from offset {start}")
-                    all_data.extend(data)
-                    break
-
-                except json.JSONDecodeError as e:
-                    logger.warning(f"[DataGenerator] JSON decode error (attempt {attempt}) at offset {start}: {e}")
-                except Exception as e:
-                    logger.warning(f"[DataGenerator] Attempt {attempt} failed at offset {start}: {e}")
+        if llm_schema and self.amplify_above is not None and total > self.amplify_above:
+            async for chunk in self._astream_amplified(schema, llm_schema, synth, seed, run_id, done):
+                yield chunk
+            if store is not None:
+                await asyncio.to_thread(store.clear, run_id)
+            return
+
+        if llm_schema and total > config.MAX_LLM_ROWS:
+            raise ValueError(
+                f"sample_size {total} exceeds MAX_LLM_ROWS ({config.MAX_LLM_ROWS}) for schemas with LLM-generated fields"
+            )
+
+        validator = RecordValidator(llm_schema) if llm_schema else None
+        prompt = ChunkPrompt(llm_schema) if llm_schema else None
+        if prompt is not None:
+            logger.info(f"[DataGenerator] Chunk prompt prefix ~{prompt.prefix_tokens} tokens")
+        # Chunks are generated independently; this catches keys and rows repeated across them.
+        # Unique columns filled locally are distinct by construction (UniqueRange).
+        # Locally synthesized columns are merged in later, so whole rows are only compared
+        # when the model produces every column.
+        index = UniquenessIndex(llm_schema.fields, total, check_rows=not (synth and synth.columns)) \
+            if llm_schema else None
+        if index is not None:
+            for records in done.values():
+                index.register(records)
+        sizer = None
+        # AIMD reacts to the order replies arrive in, which a replayed run can't reproduce
+        if llm_schema and self.adaptive_chunking and not deterministic:
+            sizer = AdaptiveChunkSizer(
+                llm_schema, self.max_output_tokens,
+                initial_size=self.chunk_size,
+                target_truncation_rate=self.target_truncation_rate
+            )
+        # Only LLM chunks cost anything; purely local runs are cheap to redo
+        checkpoint = store is not None and llm_schema is not None
+        done_starts = sorted(done)
+        next_start = 0
+        window = deque()
+
+        def schedule():
+            nonlocal next_start
+            if next_start >= total:
+                return
+            if next_start in done:
+                records = done.pop(next_start)
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(records)
+                window.append(future)
+                next_start += len(records)
+                return
+            if sizer is not None:
+                size = sizer.next_size()
             else:
-                raise RuntimeError(f"Data generation failed after {self.retry_limit} retries at offset {start}")
+                size = self.chunk_size if llm_schema else self.local_chunk_size
+            count = min(size, total - next_start)
+            # Stop short of the next checkpointed chunk so it can be reused as is
+            following = bisect.bisect_right(done_starts, next_start)
+            if following < len(done_starts):
+                count = min(count, done_starts[following] - next_start)
+            args = (schema, llm_schema, synth, next_start, count, sizer, validator, prompt, index)
+            chunk = self._checkpointed(run_id, *args) if checkpoint else self._generate_chunk(*args)
+            window.append(asyncio.ensure_future(chunk))
+            next_start += count
 
-        return all_data
+        for _ in range(1 if deterministic and llm_schema else self.max_concurrency):
+            schedule()
+        try:
+            while window:
+                chunk = await window.popleft()
+                schedule()
+                yield chunk
+            if store is not None:
+                await asyncio.to_thread(store.clear, run_id)
+        finally:
+            # A chunk exhausted its retries or the consumer went away: stop paying for the rest
+            for task in window:
+                task.cancel()
+            if sizer is not None:
+                self.last_run_stats = sizer.stats()
+                logger.info(f"[DataGenerator] Chunk sizing stats: {self.last_run_stats}")
+            if index is not None and index.rejected:
+                logger.info(f"[DataGenerator] Regenerated {index.rejected} duplicate records")
+
+    async def _checkpointed(self, run_id: str, schema: Schema, llm_schema: Optional[Schema],
+                            synth: Optional[LocalValueSynthesizer], start: int, *args) -> list:
+        """_generate_chunk, saving the records under (run_id, start) once complete"""
+        records = await self._generate_chunk(schema, llm_schema, synth, start, *args)
+        await asyncio.to_thread(self.checkpoints.save_chunk, run_id, start, records)
+        return records
+
+    async def _astream_amplified(self, schema: Schema, llm_schema: Schema,
+                                 synth: Optional[LocalValueSynthesizer], seed: Optional[int] = None,
+                                 run_id: Optional[str] = None, done: Optional[dict] = None) -> AsyncIterator[list]:
+        """
+        Few-shot amplification: a small LLM seed set grown to sample_size locally.
+        Only the seed set is checkpointed; the amplified rows are reproducible from the run seed.
+        """
+        total = schema.sample_size
+        seed_records = (done or {}).get(SEED_SET_OFFSET)
+        if seed_records is None:
+            seed_rows = min(self.amplify_seed_rows, total)
+            validator = RecordValidator(llm_schema)
+            prompt = ChunkPrompt(llm_schema)
+            index = UniquenessIndex(llm_schema.fields, seed_rows)
+            starts = range(0, seed_rows, self.chunk_size)
+
+            def request(start: int):
+                return self._request_chunk(llm_schema, start, min(self.chunk_size, seed_rows - start),
+                                           validator=validator, prompt=prompt, index=index)
+
+            if self.deterministic():
+                # Duplicates are resolved in arrival order, so keep it fixed
+                seed_chunks = [await request(start) for start in starts]
+            else:
+                seed_chunks = await asyncio.gather(*(request(start) for start in starts))
+            seed_records = [record for chunk in seed_chunks for record in chunk]
+            if run_id and self.checkpoints is not None:
+                await asyncio.to_thread(self.checkpoints.save_chunk, run_id, SEED_SET_OFFSET, seed_records)
+        amplifier = SeedAmplifier(llm_schema.fields, seed_records, seed=synth.seed if synth else seed,
+                                  unique=unique_fields(llm_schema.fields))
+        logger.info(f"[DataGenerator] Amplifying {len(seed_records)} seed records to {total}")
+
+        names = [f.name for f in schema.fields]
+
+        def build(start: int, count: int) -> list:
+            columns = amplifier.generate(start, count)
+            if synth is not None:
+                columns.update(synth.generate(start, count))
+            return [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
+
+        for start in range(0, total, self.local_chunk_size):
+            # Vectorized but CPU-bound: keep it off the event loop
+            yield await asyncio.to_thread(build, start, min(self.local_chunk_size, total - start))
+
+    async def _generate_chunk(self, schema: Schema, llm_schema: Optional[Schema],
+                              synth: Optional[LocalValueSynthesizer], start: int, chunk_count: int,
+                              sizer: Optional[AdaptiveChunkSizer] = None,
+                              validator: Optional[RecordValidator] = None,
+                              prompt: Optional[ChunkPrompt] = None,
+                              index: Optional[UniquenessIndex] = None) -> list:
+        if llm_schema is not None:
+            records = await self._request_chunk(llm_schema, start, chunk_count, sizer, validator, prompt, index)
+        else:
+            records = [{} for _ in range(chunk_count)]
+
+        if synth is not None and synth.columns:
+            local = synth.generate(start, chunk_count)
+            for i, record in enumerate(records):
+                for name, values in local.items():
+                    record[name] = values[i]
+            # Restore schema column order after merging
+            records = [{f.name: record.get(f.name) for f in schema.fields} for record in records]
+
+        return records
+
+    async def _request_chunk(self, schema: Schema, start: int, chunk_count: int,
+                             sizer: Optional[AdaptiveChunkSizer] = None,
+                             validator: Optional[RecordValidator] = None,
+                             prompt: Optional[ChunkPrompt] = None,
+                             index: Optional[UniquenessIndex] = None) -> list:
+        """
+        Requests chunk_count records, keeping every complete (and, with a validator,
+        type-valid) record from a reply and asking only for the remainder on the
+        next call. Only consecutive calls that yield nothing usable count against retry_limit.
+        With an index, records repeating a unique key or a whole earlier row are dropped
+        the same way, so only the conflicting rows are asked for again.
+
+        Transport errors are handled by self.retry: throttling and transient failures
+        back off there, and whatever it gives up on fails the chunk immediately.
+        """
+        prompt = prompt or ChunkPrompt(schema)
+        data = []
+        failures = 0
+        calls = 0
+
+        while len(data) < chunk_count:
+            remaining = chunk_count - len(data)
+            calls += 1
+            try:
+                response = await self.retry.acall(
+                    self.model.agenerate,
+                    prompt.render(remaining),
+                    temperature=0.3,
+                    max_output_tokens=self.max_output_tokens,
+                    priority="bulk",  # schema preview and other interactive calls go first
+                    replay_tag=f"chunk:{start}:{calls}"  # every chunk repeats the same prompt
+                )
+            except Exception as e:
+                raise RuntimeError(f"Data generation failed at offset {start} ({classify(e)} error): {e}") from e
+
+            try:
+                records, complete = self._parse_response(response)
+                if sizer is not None:
+                    if complete:
+                        sizer.record_success(len(records), len(response))
+                    else:
+                        sizer.record_truncation(remaining, len(records), len(response))
+                if not records:
+                    raise ValueError("No complete records in Gemini response" if response.strip()
+                                     else "Gemini returned empty response")
+                if validator is not None:
+                    records, errors = validator.validate_batch(records)
+                    if errors:
+                        logger.warning(f"[DataGenerator] Rejected {len(errors)} invalid records at offset {start}, "
+                                       f"e.g. {errors[0]}")
+                    if not records:
+                        raise ValueError("No valid records in Gemini response")
+                records = records[:remaining]
+                if index is not None:
+                    records, conflicts = index.filter(records)
+                    if conflicts:
+                        logger.info(f"[DataGenerator] Dropped {len(conflicts)} duplicate records at offset {start}, "
+                                    f"e.g. {conflicts[0]}")
+                    if not records:
+                        raise ValueError("Only duplicate records in Gemini response")
+
+                data.extend(records)
+                failures = 0
+                if len(data) < chunk_count:
+                    logger.info(f"[DataGenerator] Salvaged {len(records)}/{remaining} records at offset {start}, "
+                                f"requesting the remaining {chunk_count - len(data)}")
+                    record_retry("partial_reply")
+
+            except Exception as e:
+                failures += 1
+                logger.warning(f"[DataGenerator] Attempt {failures} failed at offset {start}: {e}")
+                if failures >= self.retry_limit:
+                    raise RuntimeError(f"Data generation failed after {self.retry_limit} retries at offset {start}")
+                record_retry("unusable_reply")
+
+        logger.info(f"[DataGenerator] Successfully generated {len(data)} records from offset {start}")
+        return data
+
+    def _parse_response(self, response: str) -> Tuple[list, bool]:
+        """Complete records in the reply, and whether the JSON array was closed"""
+        return salvage_json_array(response)
@@ -1,18 +1,60 @@
+import asyncio
 import json
 import logging
 from typing import Optional
 from models.schemas import Schema, FieldType,SchemaUpdateRequest, FieldDefinition
 from pydantic_core import ValidationError
+from config import config
+from utils.cache import LLMCache, llm_cache, make_key, normalize_text
 from utils.gemini_model import GeminiModel
+from utils.metrics import record_retry
+from utils.retry import RetryPolicy, classify
 from agents.PreprocessingAgent import PreprocessingAgent
 logger = logging.getLogger(__name__)
 class FieldInferenceAgent:
-    def __init__(self):
-        self.retry_limit = 2
-        self.preprocessor = PreprocessingAgent()
+    prompt_version = "infer-v1"  # bump whenever _infer_prompt changes to invalidate cached schemas
+
+    def __init__(self, cache: LLMCache = llm_cache):
+        self.retry_limit = 2  # attempts at getting a parseable schema
+        self.retry = RetryPolicy()  # transport retries with backoff, per call
+        self.cache = cache
+        self.preprocessor = PreprocessingAgent(cache=cache)
 
     def infer_schema(self, scenario: str, sample_size: int = 100) -> Optional[dict]:
-        prompt = f"""
+        """Blocking entry point for callers without a running event loop"""
+        return asyncio.run(self.ainfer_schema(scenario, sample_size))
+
+    async def ainfer_schema(self, scenario: str, sample_size: int = 100) -> Optional[dict]:
+        """Infers a schema dict for the scenario, or None if Gemini gives no usable one"""
+        key = self._infer_key(scenario, sample_size)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        prompt = self._infer_prompt(scenario, sample_size)
+
+        for attempt in range(self.retry_limit):
+            try:
+                response = await self.retry.acall(GeminiModel.agenerate, prompt, temperature=0.3, max_output_tokens=2000)
+            except Exception as e:
+                logger.error(f"[FieldInference] Gemini call failed ({classify(e)} error): {e}")
+                return None
+            try:
+                schema_data = self._parse_schema(response, attempt)
+                self.cache.set(key, schema_data)
+                return schema_data
+            except Exception as e:
+                logger.warning(f"[FieldInference] Attempt {attempt + 1} failed: {e}")
+                if attempt + 1 < self.retry_limit:
+                    record_retry("unusable_reply")
+
+        return None
+
+    def _infer_key(self, scenario: str, sample_size: int) -> str:
+        return make_key("infer_schema", normalize_text(scenario), sample_size, config.DEFAULT_MODEL, self.prompt_version)
+
+    def _infer_prompt(self, scenario: str, sample_size: int) -> str:
+        return f"""
         You are a data schema generator. Create a JSON schema for this scenario:
         {scenario}
 
@@ -38,34 +80,31 @@ class FieldInferenceAgent:
         }}
         """
 
-        for attempt in range(self.retry_limit):
-            try:
-                response = GeminiModel.generate(prompt, temperature=0.3, max_output_tokens=2000)
-                cleaned = response.strip().replace("```json", "").replace("```", "")
-                logger.info(f"[FieldInference] Gemini response attempt {attempt + 1}: {cleaned}")
-                schema_data = json.loads(cleaned)
-
-                if not isinstance(schema_data, dict):
-                    raise ValueError("Response is not a JSON object")
-                if "fields" not in schema_data:
-                    raise ValueError("Missing 'fields' array")
-                if "sample_size" not in schema_data:
-                    raise ValueError("Missing 'sample_size'")
-                for field in schema_data["fields"]:
-                    if "description" in field and len(field["description"]) < 20:
-                        field["description"] += " — additional details TBD."
+    def _parse_schema(self, response: str, attempt: int) -> dict:
+        cleaned = response.strip().replace("```json", "").replace("```", "")
+        logger.info(f"[FieldInference] Gemini response attempt {attempt + 1}: {cleaned}")
+        schema_data = json.loads(cleaned)
 
+        if not isinstance(schema_data, dict):
+            raise ValueError("Response is not a JSON object")
+        if "fields" not in schema_data:
+            raise ValueError("Missing 'fields' array")
+        if "sample_size" not in schema_data:
+            raise ValueError("Missing 'sample_size'")
+        for field in schema_data["fields"]:
+            if "description" in field and len(field["description"]) < 20:
+                field["description"] += " — additional details TBD."
 
-                return schema_data
-
-            except Exception as e:
-                logger.warning(f"[FieldInference] Attempt {attempt + 1} failed: {e}")
+        return schema_data
 
-        return None
-    
     def enrich_updated_schema(self, update_request: SchemaUpdateRequest) -> Schema:
+        """Blocking entry point for callers without a running event loop"""
+        return asyncio.run(self.aenrich_updated_schema(update_request))
+
+    async def aenrich_updated_schema(self, update_request: SchemaUpdateRequest) -> Schema:
         original = update_request.current_schema
         updated_fields = []
+        enriched = await self._aenrich_fields(original, update_request)
 
         for field in original.fields:
             # If field is deleted, skip
@@ -81,12 +120,11 @@ class FieldInferenceAgent:
                 cons = matching_update.constraints or field.constraints
 
                 # Enrich if description/constraints are missing
-                if not matching_update.description or not matching_update.constraints:
-                    enriched = self.preprocessor.enrich_field_metadata(original.scenario, name, ftype.value)
+                if name in enriched:
                     if not matching_update.description:
-                        desc = enriched.get("description", desc)
+                        desc = enriched[name].get("description", desc)
                     if not matching_update.constraints:
-                        cons = enriched.get("constraints", cons)
+                        cons = enriched[name].get("constraints", cons)
 
                 updated_fields.append(FieldDefinition(
                     name=name, type=ftype, description=desc, constraints=cons
@@ -99,15 +137,34 @@ class FieldInferenceAgent:
         new_field_names = {f.name for f in updated_fields}
         for f in update_request.field_updates:
             if f.name not in new_field_names:
-                enriched = self.preprocessor.enrich_field_metadata(original.scenario, f.name, f.type.value)
+                extra = enriched.get(f.name, {})
                 updated_fields.append(FieldDefinition(
                     name=f.name,
                     type=f.type,
-                    description=f.description or enriched["description"],
-                    constraints=f.constraints or enriched["constraints"]
+                    description=f.description or extra.get("description"),
+                    constraints=f.constraints or extra.get("constraints")
                 ))
 
         # Apply new sample size if updated
         sample_size = update_request.sample_size or original.sample_size
 
         return Schema(fields=updated_fields, sample_size=sample_size, scenario=original.scenario)
+
+    async def _aenrich_fields(self, original: Schema, update_request: SchemaUpdateRequest) -> dict:
+        """
+        Enrichment for every updated or new field that lacks a description or constraints,
+        requested concurrently so a schema edit costs about one round-trip. Keyed by field name.
+        """
+        kept = {field.name: field for field in original.fields if field.name not in update_request.deleted_fields}
+        wanted = {}
+        for update in update_request.field_updates:
+            if update.name in wanted or (update.description and update.constraints):
+                continue
+            field_type = update.type or kept[update.name].type if update.name in kept else update.type
+            wanted[update.name] = field_type.value
+
+        results = await asyncio.gather(*(
+            self.preprocessor.aenrich_field_metadata(original.scenario, name, field_type)
+            for name, field_type in wanted.items()
+        ))
+        return dict(zip(wanted, results))
@@ -1,9 +1,14 @@
 import asyncio
+import hmac
+import inspect
+import threading
+import time
 import uuid
 import logging
-from pydantic import BaseModel, ValidationError
-from models.schemas import Schema, FieldDefinition, FieldType
-from agents.FieldInferenceAgent import FieldInferenceAgent
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Union
+from pydantic import BaseModel
+from config import config
+from models.schemas import Schema
 
 logger = logging.getLogger(__name__)
 
@@ -13,88 +18,171 @@ class ApprovalResult(BaseModel):
     schema_def: Schema
 
 
-class HumanInteractionAgent:
-    def __init__(self, timeout_seconds: int = 60):
-        self.timeout_seconds = timeout_seconds
-        self.enricher = FieldInferenceAgent().preprocessor  # 🔁 Use Gemini for enrichment
+class PendingApproval:
+    __slots__ = ("schema", "event", "result", "loop", "created_at")
 
-    async def get_approval(self, schema: Schema) -> ApprovalResult:
-        schema_id = str(uuid.uuid4())
-        print(f"\n🔍 [Human Review] Schema for approval (id: {schema_id})\n")
-        for field in schema.fields:
-            print(f" - {field.name} ({field.type}): {field.description}")
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.event = asyncio.Event()
+        self.result: Optional[ApprovalResult] = None
+        self.loop = asyncio.get_running_loop()
+        self.created_at = time.time()
 
-        print("\n✅ Approve schema? Type 'yes' to approve, 'no' to edit schema, or press Enter to simulate timeout:")
 
-        try:
-            user_input = await asyncio.wait_for(async_input(), timeout=self.timeout_seconds)
-            choice = user_input.strip().lower()
+# Called with (schema_id, schema) when an approval opens, e.g. to notify reviewers
+ApprovalListener = Callable[[str, Schema], Union[None, Awaitable[None]]]
 
-            if not choice:
-                print("⏰ Timeout — proceeding with default approval.\n")
-                return ApprovalResult(approved=True, schema_def=schema)
 
-            elif choice == "yes":
-                return ApprovalResult(approved=True, schema_def=schema)
+class ApprovalRegistry:
+    """
+    Schemas waiting for a reviewer's decision, keyed by schema id.
+
+    A pending approval is an asyncio.Event and a dict entry, so waiting holds no
+    thread and thousands can be pending at once. resolve() may be called from any
+    thread (the Socket.IO handler, an HTTP route, a console) and wakes the waiter.
+    """
 
-            elif choice == "no":
-                edited_schema = self._edit_schema(schema)
-                return ApprovalResult(approved=True, schema_def=edited_schema)
+    def __init__(self):
+        self._pending: Dict[str, PendingApproval] = {}
+        self._lock = threading.Lock()  # resolve() and expiry race across threads
+        self.listeners: List[ApprovalListener] = []
+        self._tasks: Set[asyncio.Task] = set()
 
-            else:
-                print("❌ Invalid input — treating as rejection. Pipeline will end.")
-                return ApprovalResult(approved=False, schema_def=schema)
+    def __contains__(self, schema_id: str) -> bool:
+        return schema_id in self._pending
 
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def open(self, schema: Schema) -> str:
+        schema_id = str(uuid.uuid4())
+        entry = PendingApproval(schema)
+        with self._lock:
+            self._pending[schema_id] = entry
+        for listener in self.listeners:
+            try:
+                result = listener(schema_id, schema)
+            except Exception:
+                logger.exception("[ApprovalRegistry] Listener failed")
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._tasks.add(task)  # keep a reference until it is done
+                task.add_done_callback(self._tasks.discard)
+        return schema_id
+
+    async def wait(self, schema_id: str, timeout: Optional[float]) -> Optional[ApprovalResult]:
+        """The reviewer's decision, or None if none came within timeout seconds"""
+        entry = self._pending[schema_id]
+        try:
+            await asyncio.wait_for(entry.event.wait(), timeout=timeout)
         except asyncio.TimeoutError:
-            print("⏰ Timeout — proceeding with default approval.\n")
-            return ApprovalResult(approved=True, schema_def=schema)
+            pass
+        finally:
+            # Expiry and resolve() share the lock: a decision accepted before this
+            # point is honoured even if the timeout fired, and none is accepted after
+            with self._lock:
+                self._pending.pop(schema_id, None)
+        return entry.result
 
-    def _edit_schema(self, schema: Schema) -> Schema:
-        print("\n📝 Enter new field definitions (press Enter without input to finish):")
+    def resolve(self, schema_id: str, approved: bool, schema: Optional[Schema] = None) -> bool:
+        """Records a decision (optionally with an edited schema); False if nothing is waiting on schema_id"""
+        with self._lock:
+            entry = self._pending.get(schema_id)
+            if entry is None or entry.result is not None:
+                return False
+            entry.result = ApprovalResult(approved=approved, schema_def=schema or entry.schema)
+        entry.loop.call_soon_threadsafe(entry.event.set)
+        return True
 
-        updated_fields = schema.fields.copy()
+    def pending(self) -> List[dict]:
+        with self._lock:
+            items = list(self._pending.items())
+        return [
+            {"schema_id": schema_id, "schema": entry.schema, "created_at": entry.created_at}
+            for schema_id, entry in items
+        ]
 
-        while True:
-            name = input("   ➤ Field name (or press Enter to finish): ").strip()
-            if not name:
-                break
 
-            ftype = input("   ➤ Field type (string, number, boolean, date, datetime): ").strip().lower()
-            desc = input("   ➤ Field description (optional): ").strip()
-            constraints = input("   ➤ Field constraints (optional): ").strip() or None
+# A policy returns True to approve without waiting for a reviewer
+ApprovalPolicy = Callable[[Schema, Optional[str]], bool]
 
-            # 🔍 Auto-enrich if description missing
-            if not desc or len(desc) < 20:
-                enriched = self.enricher.enrich_field_metadata(schema.scenario, name, ftype)
-                desc = enriched.get("description", desc)
-                if not constraints:
-                    constraints = enriched.get("constraints")
 
-            try:
-                updated_fields.append(FieldDefinition(
-                    name=name,
-                    type=FieldType(ftype),
-                    description=desc,
-                    constraints=constraints
-                ))
-            except (ValueError, ValidationError) as e:
-                print(f"❌ Invalid field definition: {e}")
-                continue
+def _token_in(token: Optional[str], tokens: List[str]) -> bool:
+    return token is not None and any(hmac.compare_digest(token, candidate) for candidate in tokens)
 
-        try:
-            new_sample = input(f"\n🔢 New sample size (default: {schema.sample_size}): ").strip()
-            sample_size = int(new_sample) if new_sample else schema.sample_size
-        except:
-            sample_size = schema.sample_size
-
-        return Schema(
-            fields=updated_fields,
-            sample_size=sample_size,
-            scenario=schema.scenario
-        )
-
-
-# 🔄 Awaitable user input helper
-async def async_input():
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, input)
+
+def is_reviewer(token: Optional[str]) -> bool:
+    """Whether token is a reviewer credential, allowed to see and decide pending approvals"""
+    return _token_in(token, config.APPROVAL_REVIEWER_TOKENS)
+
+
+def trusted_callers(tokens: List[str]) -> ApprovalPolicy:
+    """Approves callers presenting one of the configured approval tokens"""
+    def policy(schema: Schema, caller: Optional[str]) -> bool:
+        return _token_in(caller, tokens)
+    policy.__name__ = "trusted_callers"
+    return policy
+
+
+def small_runs(max_rows: int) -> ApprovalPolicy:
+    """Approves runs of at most max_rows rows, where a wrong schema costs little"""
+    def policy(schema: Schema, caller: Optional[str]) -> bool:
+        return schema.sample_size <= max_rows
+    policy.__name__ = "small_runs"
+    return policy
+
+
+def approve_all(schema: Schema, caller: Optional[str]) -> bool:
+    return True
+
+
+def build_policies() -> List[ApprovalPolicy]:
+    if config.APPROVAL_MODE == "auto":
+        return [approve_all]
+    policies = []
+    if config.APPROVAL_TRUSTED_TOKENS:
+        policies.append(trusted_callers(config.APPROVAL_TRUSTED_TOKENS))
+    if config.APPROVAL_AUTO_MAX_ROWS is not None:
+        policies.append(small_runs(config.APPROVAL_AUTO_MAX_ROWS))
+    return policies
+
+
+# Process-wide registry shared by every HumanInteractionAgent and the approval endpoints
+approval_registry = ApprovalRegistry()
+
+
+class HumanInteractionAgent:
+    def __init__(self, timeout_seconds: Optional[float] = config.APPROVAL_TIMEOUT_SECONDS,
+                 registry: ApprovalRegistry = approval_registry,
+                 policies: Optional[List[ApprovalPolicy]] = None,
+                 approve_on_timeout: bool = config.APPROVAL_TIMEOUT_APPROVES):
+        self.timeout_seconds = timeout_seconds
+        self.registry = registry
+        self.policies = build_policies() if policies is None else policies
+        self.approve_on_timeout = approve_on_timeout
+
+    async def get_approval(self, schema: Schema, caller: Optional[str] = None) -> ApprovalResult:
+        """
+        Auto-approves when a policy allows it; otherwise opens a pending approval in
+        the registry and waits for a reviewer (Socket.IO submit_approval or the
+        /approvals endpoints) until timeout_seconds.
+        """
+        for policy in self.policies:
+            if policy(schema, caller):
+                logger.info(f"[HumanInteraction] Schema auto-approved by {policy.__name__}")
+                return ApprovalResult(approved=True, schema_def=schema)
+
+        schema_id = self.registry.open(schema)
+        fields = ", ".join(f"{field.name} ({field.type.value})" for field in schema.fields)
+        logger.info(f"[HumanInteraction] Schema {schema_id} awaiting approval: {fields}")
+
+        result = await self.registry.wait(schema_id, self.timeout_seconds)
+        if result is None:
+            verdict = "approving" if self.approve_on_timeout else "rejecting"
+            logger.info(f"[HumanInteraction] No decision on schema {schema_id} within "
+                        f"{self.timeout_seconds}s, {verdict} by default")
+            return ApprovalResult(approved=self.approve_on_timeout, schema_def=schema)
+
+        logger.info(f"[HumanInteraction] Schema {schema_id} {'approved' if result.approved else 'rejected'}")
+        return result
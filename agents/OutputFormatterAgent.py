@@ -1,27 +1,262 @@
-from models.schemas import GeneratedData
-import pandas as pd
+from config import config
+from models.schemas import GeneratedData, FieldDefinition, FieldType
+from utils.metrics import record_output
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import xlsxwriter
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from datetime import date, datetime, timezone
 from io import StringIO, BytesIO
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+ARROW_TYPES = {
+    FieldType.STRING: pa.string(),
+    FieldType.NUMBER: pa.float64(),
+    FieldType.BOOLEAN: pa.bool_(),
+    FieldType.DATE: pa.date32(),
+    FieldType.DATETIME: pa.timestamp("us", tz="UTC"),
+}
+
+
+def arrow_schema_for(fields: List[FieldDefinition]) -> pa.Schema:
+    """Column types derived from the generation schema rather than sniffed from values"""
+    return pa.schema([pa.field(f.name, ARROW_TYPES[f.type]) for f in fields])
+
+
+def _to_date(value):
+    return date.fromisoformat(value[:10]) if isinstance(value, str) else value
+
+
+def _to_timestamp(value):
+    if not isinstance(value, str):
+        return value
+    parsed = datetime.fromisoformat(value)
+    # Naive datetimes are taken as UTC so the column has a single, explicit zone
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed
+
+
+class CsvChunkWriter:
+    """Row-wise CSV writer: each chunk is encoded and flushed as it arrives"""
+
+    def __init__(self, fileobj: BinaryIO, fieldnames: List[str], **options):
+        self._text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="", write_through=True)
+        self._writer = csv.DictWriter(self._text, fieldnames=fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, records: list) -> None:
+        self._writer.writerows(records)
+
+    def close(self) -> None:
+        self._text.flush()
+        self._text.detach()  # leave the underlying file open for the caller
+
+
+class ExcelChunkWriter:
+    """xlsxwriter in constant_memory mode: only the current row is held in memory"""
+
+    def __init__(self, fileobj: BinaryIO, fieldnames: List[str], **options):
+        self._workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True})
+        if config.SOURCE_DATE_EPOCH is not None:
+            # The only timestamp in the file; pinning it makes the bytes reproducible
+            self._workbook.set_properties({"created": datetime.fromtimestamp(config.SOURCE_DATE_EPOCH, timezone.utc)})
+        self._sheet = self._workbook.add_worksheet()
+        self._fieldnames = fieldnames
+        self._sheet.write_row(0, 0, fieldnames)
+        self._row = 1
+
+    def write(self, records: list) -> None:
+        for record in records:
+            self._sheet.write_row(self._row, 0, [record.get(name) for name in self._fieldnames])
+            self._row += 1
+
+    def close(self) -> None:
+        self._workbook.close()
+
+
+class ColumnarChunkWriter:
+    """
+    Base for Parquet/Arrow IPC: chunks are buffered up to row_group_rows records
+    and written as one row group / record batch, so memory stays O(row group).
+    """
+    default_compression: Optional[str] = None
+    compressions: Optional[tuple] = None  # None allows any codec the format library accepts
+
+    def __init__(self, fileobj: BinaryIO, fieldnames: List[str], arrow_schema: Optional[pa.Schema] = None,
+                 compression: Optional[str] = None, row_group_rows: int = 50_000):
+        self._fileobj = fileobj
+        self._fieldnames = fieldnames
+        self._schema = arrow_schema
+        self._compression = compression if compression is not None else self.default_compression
+        if self._compression == "none":
+            self._compression = None
+        if self.compressions is not None and self._compression not in (None, *self.compressions):
+            raise ValueError(f"{type(self).__name__} supports only {' or '.join(self.compressions)} compression, "
+                             f"got {self._compression}")
+        self._row_group_rows = row_group_rows
+        self._pending = []
+        self._writer = None
+
+    def write(self, records: list) -> None:
+        self._pending.extend(records)
+        if len(self._pending) >= self._row_group_rows:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is None:
+            self._writer = self._open(self._schema or pa.schema([pa.field(n, pa.null()) for n in self._fieldnames]))
+        self._writer.close()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        table = self._to_table(self._pending)
+        self._pending = []
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._open(table.schema)
+        self._writer.write_table(table)
+
+    def _to_table(self, records: list) -> pa.Table:
+        if self._schema is None:
+            # No generation schema: let Arrow infer types from the first row group
+            return pa.Table.from_pylist(records).select(self._fieldnames)
+        columns = []
+        for field in self._schema:
+            values = [record.get(field.name) for record in records]
+            if pa.types.is_date32(field.type):
+                values = [_to_date(v) for v in values]
+            elif pa.types.is_timestamp(field.type):
+                values = [_to_timestamp(v) for v in values]
+            columns.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def _open(self, schema: pa.Schema):
+        raise NotImplementedError
+
+
+class ParquetChunkWriter(ColumnarChunkWriter):
+    default_compression = "zstd"
+
+    def _open(self, schema: pa.Schema):
+        return pq.ParquetWriter(self._fileobj, schema, compression=self._compression or "none")
+
+
+class ArrowChunkWriter(ColumnarChunkWriter):
+    """Arrow IPC file format; the IPC spec only allows lz4/zstd buffer compression"""
+    compressions = ("lz4", "zstd")
+
+    def _open(self, schema: pa.Schema):
+        options = ipc.IpcWriteOptions(compression=self._compression)
+        return ipc.new_file(self._fileobj, schema, options=options)
+
 
 class OutputFormatterAgent:
-    def format(self, data: list, output_format: str) -> GeneratedData:
+    writers = {
+        "csv": CsvChunkWriter,
+        "excel": ExcelChunkWriter,
+        "parquet": ParquetChunkWriter,
+        "arrow": ArrowChunkWriter,
+    }
+    spool_max_bytes = 8 * 1024 * 1024  # file outputs spill to disk beyond this
+
+    def format(self, data: list, output_format: str, compression: Optional[str] = None) -> GeneratedData:
         """Formats data to requested output type"""
 
-        # JSON output returns as-is
+        # JSON output returns as-is; its bytes are only known once the response is serialized
         if output_format == "json":
+            record_output("json", len(data), 0)
             return GeneratedData(data=data, format="json")
 
-        df = pd.DataFrame(data)
-
-        if output_format == "csv":
-            buffer = StringIO()
-            df.to_csv(buffer, index=False)
-            csv_bytes = buffer.getvalue().encode("utf-8")
-            return GeneratedData(file_content=csv_bytes, format="csv")
-
-        elif output_format == "excel":
+        if output_format in self.writers:
             buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                df.to_excel(writer, index=False)
-            return GeneratedData(file_content=buffer.getvalue(), format="excel")
+            fieldnames = list(dict.fromkeys(key for record in data for key in record))
+            writer = self.writers[output_format](buffer, fieldnames, compression=compression)
+            writer.write(data)
+            writer.close()
+            record_output(output_format, len(data), buffer.tell())
+            return GeneratedData(file_content=buffer.getvalue(), format=output_format)
 
         raise ValueError(f"Unsupported format: {output_format}")
+
+    async def write_spool(self, chunks: AsyncIterator[list], output_format: str,
+                          fields: List[FieldDefinition], compression: Optional[str] = None) -> BinaryIO:
+        """
+        Writes a file format chunk by chunk, so only one chunk (or row group) is held in memory.
+        Returns the spooled file rewound to the start; the caller owns it and must close it.
+        """
+        if output_format not in self.writers:
+            raise ValueError(f"Format cannot be written incrementally: {output_format}")
+
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes)
+        try:
+            await self.write_to(spool, chunks, output_format, fields, compression)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    async def write_to(self, fileobj: BinaryIO, chunks: AsyncIterator[list], output_format: str,
+                       fields: List[FieldDefinition], compression: Optional[str] = None) -> None:
+        """Writes chunks into an open binary file; the caller owns and closes it"""
+        if output_format not in self.writers:
+            raise ValueError(f"Format cannot be written incrementally: {output_format}")
+
+        started = fileobj.tell()
+        rows = 0
+        writer = self.writers[output_format](
+            fileobj,
+            [f.name for f in fields],
+            arrow_schema=arrow_schema_for(fields),
+            compression=compression
+        )
+        async for chunk in chunks:
+            await asyncio.to_thread(writer.write, chunk)
+            rows += len(chunk)
+        await asyncio.to_thread(writer.close)
+        record_output(output_format, rows, fileobj.tell() - started)
+
+    async def write_stream(self, chunks: AsyncIterator[list], output_format: str,
+                           fields: List[FieldDefinition], compression: Optional[str] = None) -> GeneratedData:
+        """Chunked write_spool, read back into GeneratedData.file_content"""
+        with await self.write_spool(chunks, output_format, fields, compression) as spool:
+            return GeneratedData(file_content=spool.read(), format=output_format)
+
+    async def stream(self, chunks: AsyncIterator[list], output_format: str,
+                     fieldnames: List[str], transport: str = "ndjson") -> AsyncIterator[str]:
+        """Serializes generator chunks as they arrive: CSV rows, or records as NDJSON/SSE"""
+        if output_format not in ("csv", "json"):
+            raise ValueError(f"Format cannot be streamed: {output_format}")
+        rows = sent = 0
+        try:
+            if output_format == "csv":
+                buffer = StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+                writer.writeheader()
+                async for chunk in chunks:
+                    writer.writerows(chunk)
+                    piece = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    rows += len(chunk)
+                    sent += len(piece)
+                    yield piece
+                return
+
+            async for chunk in chunks:
+                if transport == "sse":
+                    piece = "".join(f"event: record\ndata: {json.dumps(record)}\n\n" for record in chunk)
+                else:
+                    piece = "".join(json.dumps(record) + "\n" for record in chunk)
+                rows += len(chunk)
+                sent += len(piece)
+                yield piece
+        finally:
+            # Characters rather than bytes; they differ only for non-ASCII CSV values
+            record_output(output_format, rows, sent)
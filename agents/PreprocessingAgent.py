@@ -1,10 +1,59 @@
+import asyncio
 import re
+import json
+from typing import Optional
+from config import config
+from utils.cache import LLMCache, llm_cache, make_key, normalize_text
 from utils.gemini_model import GeminiModel
+from utils.retry import RetryPolicy
 
 class PreprocessingAgent:
+    prompt_version = "clean-v1"  # bump whenever _clean_prompt changes to invalidate cached results
+    enrich_prompt_version = "enrich-v1"  # same for _enrich_prompt
+
+    def __init__(self, cache: LLMCache = llm_cache):
+        self.cache = cache
+        self.retry = RetryPolicy()  # transport retries with backoff, per call
+
     def clean(self, scenario: str) -> str:
+        """Blocking entry point for callers without a running event loop"""
+        return asyncio.run(self.aclean(scenario))
+
+    async def aclean(self, scenario: str) -> str:
         """Cleans and clarifies the input scenario"""
-        prompt = f"""
+        key = self._clean_key(scenario)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        cleaned = await self.retry.acall(GeminiModel.agenerate, self._clean_prompt(scenario))
+        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        self.cache.set(key, cleaned)
+        return cleaned
+
+    def enrich_field_metadata(self, scenario: str, field_name: str, field_type: str) -> dict:
+        """Blocking entry point for callers without a running event loop"""
+        return asyncio.run(self.aenrich_field_metadata(scenario, field_name, field_type))
+
+    async def aenrich_field_metadata(self, scenario: str, field_name: str, field_type: str) -> dict:
+        """Generates missing field description, constraints, and example"""
+        key = self._enrich_key(scenario, field_name, field_type)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = await self.retry.acall(GeminiModel.agenerate, self._enrich_prompt(scenario, field_name, field_type))
+        return self._store_enrichment(key, response, field_name)
+
+    def _clean_key(self, scenario: str) -> str:
+        return make_key("clean", normalize_text(scenario), config.DEFAULT_MODEL, self.prompt_version)
+
+    def _enrich_key(self, scenario: str, field_name: str, field_type: str) -> str:
+        return make_key("enrich", normalize_text(scenario), field_name, field_type,
+                        config.DEFAULT_MODEL, self.enrich_prompt_version)
+
+    def _clean_prompt(self, scenario: str) -> str:
+        return f"""
         Simplify and clean the following user scenario.
         Extract the core business domain and main data entities needed.
         Refine this data generation scenario:
@@ -18,12 +67,9 @@ class PreprocessingAgent:
 
         Return ONLY the cleaned text.
         """
-        cleaned = GeminiModel.generate(prompt)
-        return re.sub(r'\s+', ' ', cleaned).strip()
-    
-    def enrich_field_metadata(self, scenario: str, field_name: str, field_type: str) -> dict:
-        """Generates missing field description, constraints, and example"""
-        prompt = f"""
+
+    def _enrich_prompt(self, scenario: str, field_name: str, field_type: str) -> str:
+        return f"""
         Given the scenario: "{scenario}"
 
         Provide a detailed description, sample constraint, and realistic example value
@@ -36,16 +82,24 @@ class PreprocessingAgent:
             "example": "..."
         }}
         """
-        response = GeminiModel.generate(prompt).strip()
-        response = response.replace("```json", "").replace("```", "").strip()
 
-        # Basic fallback if Gemini misbehaves
-        try:
-            import json
-            return json.loads(response)
-        except:
+    def _store_enrichment(self, key: str, response: str, field_name: str) -> dict:
+        enriched = self._parse_enrichment(response)
+        if enriched is None:
+            # Basic fallback if Gemini misbehaves; not cached so the next edit asks again
             return {
                 "description": f"{field_name.replace('_', ' ').capitalize()}",
                 "constraints": None,
                 "example": None
             }
+        self.cache.set(key, enriched)
+        return enriched
+
+    def _parse_enrichment(self, response: str) -> Optional[dict]:
+        response = response.strip()
+        response = response.replace("```json", "").replace("```", "").strip()
+        try:
+            enriched = json.loads(response)
+        except ValueError:
+            return None
+        return enriched if isinstance(enriched, dict) else None
@@ -0,0 +1,47 @@
+"""
+Benchmark: few-shot amplification throughput.
+
+A fake model supplies the seed rows; everything after that is local expansion,
+so the number reported is rows/sec of DataGeneratorAgent's amplification path.
+
+Run from the repo root:
+    python -m benchmarks.bench_amplification [rows]
+"""
+import asyncio
+import sys
+import time
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from benchmarks.fake_llm import FakeGeminiModel
+from models.schemas import Schema
+
+SCHEMA_FIELDS = [
+    {"name": "customer_id", "type": "string", "description": "Unique customer identifier (UUID v4 format)"},
+    {"name": "full_name", "type": "string", "description": "Customer full name as shown on the account"},
+    {"name": "city", "type": "string", "description": "City of the customer's billing address"},
+    {"name": "lifetime_value", "type": "number", "description": "Total revenue attributed to the customer"},
+    {"name": "orders", "type": "number", "description": "Number of orders placed by the customer"},
+    {"name": "is_subscribed", "type": "boolean", "description": "Whether the customer receives the newsletter"},
+    {"name": "signup_date", "type": "date", "description": "Date the customer created their account"},
+    {"name": "last_login", "type": "datetime", "description": "Timestamp of the customer's most recent login"},
+]
+
+
+async def main(rows: int):
+    schema = Schema(fields=SCHEMA_FIELDS, sample_size=rows, scenario="E-commerce customers for churn analysis")
+    model = FakeGeminiModel()
+    generator = DataGeneratorAgent(model=model, seed=7, amplify_above=0)
+
+    start = time.perf_counter()
+    produced = 0
+    async for chunk in generator.astream(schema):
+        produced += len(chunk)
+    elapsed = time.perf_counter() - start
+
+    print(f"rows:        {produced}")
+    print(f"LLM calls:   {model.calls}")
+    print(f"elapsed:     {elapsed:.2f} s")
+    print(f"throughput:  {produced / elapsed:,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
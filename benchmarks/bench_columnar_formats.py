@@ -0,0 +1,67 @@
+"""
+Benchmark: file size, write time and load time of CSV vs Parquet vs Arrow IPC.
+
+Every format is written through OutputFormatterAgent.write_stream from the same
+chunks, then loaded back the way a downstream consumer would (pandas.read_csv for
+CSV, pyarrow for the columnar formats, converted to a DataFrame in both cases).
+
+Run from the repo root:
+    python -m benchmarks.bench_columnar_formats [rows]
+"""
+import asyncio
+import sys
+import time
+from io import BytesIO
+import pandas as pd
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from agents.OutputFormatterAgent import OutputFormatterAgent
+from benchmarks.bench_output_writers import CHUNK, FIELDS, make_chunk
+
+VARIANTS = [
+    ("csv", None),
+    ("parquet", "snappy"),
+    ("parquet", "zstd"),
+    ("arrow", "none"),
+    ("arrow", "lz4"),
+    ("arrow", "zstd"),
+]
+
+LOADERS = {
+    "csv": lambda content: pd.read_csv(BytesIO(content)),
+    "parquet": lambda content: pq.read_table(BytesIO(content)).to_pandas(),
+    "arrow": lambda content: ipc.open_file(BytesIO(content)).read_all().to_pandas(),
+}
+
+
+def write(rows: int, output_format: str, compression) -> bytes:
+    async def chunks():
+        for start in range(0, rows, CHUNK):
+            yield make_chunk(start, min(CHUNK, rows - start))
+
+    formatter = OutputFormatterAgent()
+    result = asyncio.run(formatter.write_stream(chunks(), output_format, FIELDS, compression=compression))
+    return result.file_content
+
+
+def main(rows: int):
+    print(f"rows: {rows}, chunk: {CHUNK}")
+    csv_size = None
+    for output_format, compression in VARIANTS:
+        start = time.perf_counter()
+        content = write(rows, output_format, compression)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frame = LOADERS[output_format](content)
+        load_time = time.perf_counter() - start
+        assert len(frame) == rows
+
+        csv_size = csv_size or len(content)
+        label = f"{output_format}/{compression or '-'}"
+        print(f"{label:14s} size {len(content) / 1e6:7.2f} MB ({len(content) / csv_size:5.1%} of csv)  "
+              f"write {write_time:6.2f} s  load {load_time:6.3f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: per-call overhead of obtaining a Gemini model, with a stubbed transport.
+
+Compares building a GenerativeModel + GenerationConfig on every call against a
+GeminiModel.get_model() registry lookup. Both sides then make the same
+generate_content call, so the rate limiter, replay and metrics layers of
+GeminiModel.generate stay out of the comparison. No network traffic is made.
+
+Run from the repo root:
+    python -m benchmarks.bench_gemini_client [calls]
+"""
+import sys
+import time
+import google.generativeai as genai
+from google.generativeai import client, protos
+from google.generativeai.types import GenerationConfig
+from config import config
+from utils.gemini_model import GeminiModel
+
+GENERATION_CONFIG = {"temperature": 0.3, "top_p": 0.9, "max_output_tokens": 2000}
+
+
+class StubTransport:
+    """Stands in for the SDK's GenerativeServiceClient and answers instantly"""
+
+    def __init__(self):
+        self.response = protos.GenerateContentResponse(candidates=[{
+            "content": {"parts": [{"text": '[{"id": 1}]'}], "role": "model"},
+            "finish_reason": 1,
+        }])
+
+    def generate_content(self, request, **kwargs):
+        return self.response
+
+
+def per_call_construction(prompt: str) -> str:
+    """The pre-registry path: a new model and config for every call"""
+    model = genai.GenerativeModel(config.DEFAULT_MODEL, generation_config=GenerationConfig(**GENERATION_CONFIG))
+    return model.generate_content(prompt).text
+
+
+def registry(prompt: str) -> str:
+    model = GeminiModel.get_model(generation_config=GENERATION_CONFIG)
+    return model.generate_content(prompt).text
+
+
+def run(fn, calls: int) -> float:
+    fn("warm-up")
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn("Generate exactly 20 records.")
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(calls: int = 20000):
+    stub = StubTransport()
+    client.get_default_generative_client = lambda: stub
+
+    baseline = run(per_call_construction, calls)
+    cached = run(registry, calls)
+
+    print(f"calls per variant:        {calls}")
+    print(f"per-call construction:    {baseline:8.1f} us/call")
+    print(f"model registry:           {cached:8.1f} us/call")
+    print(f"overhead reduction:       {(1 - cached / baseline) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,92 @@
+"""
+Benchmark: peak memory of CSV/Excel output, DataFrame path vs chunked writers.
+
+The "dataframe" variant is the previous OutputFormatterAgent.format body: the full
+record list, a DataFrame, a text/bytes buffer and the encoded copy. The
+"streaming" variant feeds OutputFormatterAgent.write_stream chunk by chunk, the
+way the pipeline now does. Peak memory is measured with tracemalloc and covers
+record creation too, so both numbers include the data being formatted.
+tracemalloc slows allocation-heavy code, so timings are only comparable to each other.
+
+Run from the repo root:
+    python -m benchmarks.bench_output_writers [rows]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+from io import BytesIO, StringIO
+import pandas as pd
+from agents.OutputFormatterAgent import OutputFormatterAgent
+from models.schemas import FieldDefinition
+
+FIELD_TYPES = {
+    "order_id": "string",
+    "customer": "string",
+    "amount": "number",
+    "quantity": "number",
+    "is_gift": "boolean",
+    "order_date": "date",
+    "notes": "string",
+}
+FIELDS = [FieldDefinition(name=name, type=field_type, description=f"Benchmark column {name} of an order")
+          for name, field_type in FIELD_TYPES.items()]
+CHUNK = 1000
+
+
+def make_chunk(start: int, count: int) -> list:
+    return [{
+        "order_id": f"ORD-{i:08d}",
+        "customer": f"Customer {i % 977}",
+        "amount": round(i * 0.37 % 500, 2),
+        "quantity": i % 9 + 1,
+        "is_gift": i % 5 == 0,
+        "order_date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+        "notes": "Leave at the front desk if nobody answers the door",
+    } for i in range(start, start + count)]
+
+
+def dataframe_path(rows: int, output_format: str) -> int:
+    data = make_chunk(0, rows)
+    df = pd.DataFrame(data)
+    if output_format == "csv":
+        buffer = StringIO()
+        df.to_csv(buffer, index=False)
+        return len(buffer.getvalue().encode("utf-8"))
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False)
+    return len(buffer.getvalue())
+
+
+def streaming_path(rows: int, output_format: str) -> int:
+    async def chunks():
+        for start in range(0, rows, CHUNK):
+            yield make_chunk(start, min(CHUNK, rows - start))
+
+    formatter = OutputFormatterAgent()
+    result = asyncio.run(formatter.write_stream(chunks(), output_format, FIELDS))
+    return len(result.file_content)
+
+
+def measure(fn, rows: int, output_format: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn(rows, output_format)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+def main(rows: int):
+    print(f"rows: {rows}, chunk: {CHUNK}")
+    for output_format in ("csv", "excel"):
+        for label, fn in (("dataframe", dataframe_path), ("streaming", streaming_path)):
+            size, peak, elapsed = measure(fn, rows, output_format)
+            print(f"{output_format:6s} {label:10s} output {size / 1e6:7.1f} MB  "
+                  f"peak traced {peak / 1e6:7.1f} MB  {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
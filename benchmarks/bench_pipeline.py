@@ -0,0 +1,206 @@
+"""
+Benchmark suite: end-to-end throughput of the generation pipelines.
+
+Drives pipeline.create_pipeline() and modular_pipeline.Pipeline with every Gemini
+call answered by benchmarks.fake_llm, injected below GeminiModel so the rate
+limiter, retries and parsing all run as in production. The fake's latency
+distribution, failure rate and truncation rate are configurable.
+
+Each (pipeline, sample size, format) case runs in a fresh process, so peak RSS is
+that case's own. Every request uses a distinct scenario, so cleaning and schema
+inference are never served from cache. Approval is automatic (APPROVAL_MODE=auto)
+and logging below ERROR is silenced.
+
+Reported per case: rows/sec over the whole case, p50/p99 request latency, LLM calls
+per 1k rows, failed requests and peak RSS.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline [--sizes 100,1000] [--formats json,csv] [--latency 0.2] ...
+    python -m benchmarks.bench_pipeline --save baseline.json
+    python -m benchmarks.bench_pipeline --baseline baseline.json   # exits 1 on a regression
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+PIPELINES = ("graph", "modular")
+SCENARIO = (
+    "An online shop wants a customer table for churn analysis: names, contact emails, billing city, "
+    "lifetime value, newsletter subscription, signup date and most recent login"
+)
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def run_case(case: dict, options: dict) -> dict:
+    """Runs one case in the current (fresh) process and returns its measurements"""
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["CHECKPOINT_DB_PATH"] = os.path.join(options["workdir"], f"checkpoints-{os.getpid()}.db")
+    os.environ["APPROVAL_MODE"] = "auto"
+
+    import resource
+    from benchmarks.fake_llm import FakeGeminiModel, install
+    from models.schemas import GenerationRequest
+    from utils.gemini_model import GeminiModel
+    from utils.rate_limiter import RateLimiter
+    import modular_pipeline
+    import pipeline
+
+    logging.disable(logging.WARNING)
+
+    fake = FakeGeminiModel(latency=options["latency"], latency_sigma=options["latency_sigma"],
+                           failure_rate=options["failure_rate"], truncation_rate=options["truncation_rate"])
+    install(fake)
+    if options["unlimited"]:
+        GeminiModel.limiter = RateLimiter()
+
+    if case["pipeline"] == "graph":
+        graph = pipeline.create_pipeline()
+
+        async def invoke(request):
+            result = await graph.ainvoke({"request": request})
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            return result["output"]
+    else:
+        invoke = modular_pipeline.Pipeline().run_full_pipeline
+
+    async def main():
+        gate = asyncio.Semaphore(options["concurrency"])
+        latencies, rows, failures = [], 0, 0
+
+        async def one(i: int):
+            nonlocal rows, failures
+            request = GenerationRequest(scenario=f"{SCENARIO} (request {i})", sample_size=case["size"],
+                                        output_format=case["format"])
+            async with gate:
+                start = time.perf_counter()
+                try:
+                    output = await invoke(request)
+                except Exception:
+                    failures += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                rows += len(output.data) if output.data is not None else request.sample_size
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(options["requests"])))
+        return time.perf_counter() - start, latencies, rows, failures
+
+    elapsed, latencies, rows, failures = asyncio.run(main())
+    return {
+        **case,
+        "requests": options["requests"],
+        "failed": failures,
+        "rows_per_sec": round(rows / elapsed, 1),
+        "p50_s": round(percentile(latencies, 50), 3) if latencies else None,
+        "p99_s": round(percentile(latencies, 99), 3) if latencies else None,
+        "llm_calls_per_1k_rows": round(fake.calls / rows * 1000, 1) if rows else None,
+        "injected_failures": fake.failures,
+        "injected_truncations": fake.truncations,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def case_key(result: dict) -> tuple:
+    return result["pipeline"], result["size"], result["format"]
+
+
+def regressions(results: list, baseline: list, tolerance: float) -> list:
+    """Cases whose throughput fell, or whose p99 latency grew, by more than tolerance"""
+    previous = {case_key(result): result for result in baseline}
+    found = []
+    for result in results:
+        before = previous.get(case_key(result))
+        if before is None:
+            continue
+        if result["rows_per_sec"] < before["rows_per_sec"] * (1 - tolerance):
+            found.append(f"{case_key(result)}: rows/sec {before['rows_per_sec']} -> {result['rows_per_sec']}")
+        if before["p99_s"] and result["p99_s"] and result["p99_s"] > before["p99_s"] * (1 + tolerance):
+            found.append(f"{case_key(result)}: p99 {before['p99_s']} s -> {result['p99_s']} s")
+        if result["failed"] > before["failed"]:
+            found.append(f"{case_key(result)}: failed requests {before['failed']} -> {result['failed']}")
+    return found
+
+
+def print_table(results: list) -> None:
+    columns = ["pipeline", "size", "format", "failed", "rows_per_sec", "p50_s", "p99_s",
+               "llm_calls_per_1k_rows", "peak_rss_mb"]
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--pipelines", default="graph,modular")
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--formats", default="json,csv,parquet")
+    parser.add_argument("--requests", type=int, default=3, help="requests per case")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight per case")
+    parser.add_argument("--latency", type=float, default=0.2, help="median seconds per LLM call")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="log-normal spread of call latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of calls failing transiently")
+    parser.add_argument("--truncation-rate", type=float, default=0.0, help="share of replies cut off")
+    parser.add_argument("--unlimited", action="store_true", help="lift the configured Gemini RPM/TPM limits")
+    parser.add_argument("--save", help="write results as JSON, e.g. to use as a baseline")
+    parser.add_argument("--baseline", help="compare against saved results and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown vs the baseline")
+    args = parser.parse_args(argv)
+
+    pipelines = args.pipelines.split(",")
+    unknown = set(pipelines) - set(PIPELINES)
+    if unknown:
+        parser.error(f"unknown pipeline(s): {', '.join(sorted(unknown))}")
+
+    cases = [
+        {"pipeline": name, "size": int(size), "format": fmt}
+        for name in pipelines for size in args.sizes.split(",") for fmt in args.formats.split(",")
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        options = {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "latency_sigma": args.latency_sigma,
+            "failure_rate": args.failure_rate,
+            "truncation_rate": args.truncation_rate,
+            "unlimited": args.unlimited,
+            "workdir": workdir,
+        }
+        for case in cases:
+            # A fresh interpreter per case keeps peak RSS and module state separate
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                results.append(pool.submit(run_case, case, options).result())
+            print(f"done: {case['pipeline']} {case['size']} {case['format']}", file=sys.stderr)
+
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Benchmark: size of the per-chunk generator prompt, before and after compaction.
+
+"verbose" is the previous DataGeneratorAgent._build_prompt: the whole Schema as
+indented JSON (scenario, sample_size, every field attribute) inside a long rule
+block. "compact" is utils.prompt_builder.ChunkPrompt. Tokens are estimated at
+CHARS_PER_TOKEN characters per token, the same estimate the chunk sizer uses.
+
+Run from the repo root:
+    python -m benchmarks.bench_prompt_compaction [chunks]
+"""
+import sys
+from models.schemas import Schema
+from utils.prompt_builder import ChunkPrompt, estimate_tokens
+
+SCHEMA = Schema(
+    scenario=(
+        "An online retailer selling consumer electronics and home appliances across Europe wants a "
+        "synthetic order history to test its analytics pipeline: orders, customers, shipping, returns "
+        "and payment details, with realistic seasonality and a mix of domestic and cross-border orders."
+    ),
+    sample_size=10000,
+    fields=[
+        {"name": "order_id", "type": "string", "description": "Unique identifier of the order, assigned at checkout",
+         "constraints": "Format ORD- followed by 8 digits, unique"},
+        {"name": "customer_name", "type": "string", "description": "Full name of the customer who placed the order"},
+        {"name": "customer_email", "type": "string", "description": "Email address the order confirmation was sent to",
+         "constraints": "Valid email address"},
+        {"name": "country", "type": "string", "description": "Country the order is shipped to, as an ISO 3166 alpha-2 code",
+         "constraints": "One of DE, FR, IT, ES, NL, BE, AT, PL"},
+        {"name": "product_category", "type": "string", "description": "Top-level category of the main product in the order",
+         "constraints": "One of phones, laptops, audio, kitchen, cleaning, tv"},
+        {"name": "order_total", "type": "number", "description": "Total amount charged for the order in euros, including VAT",
+         "constraints": "Between 5 and 4000, two decimals"},
+        {"name": "items", "type": "number", "description": "Number of items in the order across all order lines",
+         "constraints": "Between 1 and 12"},
+        {"name": "order_date", "type": "date", "description": "Calendar date on which the order was placed by the customer"},
+        {"name": "shipped_at", "type": "datetime", "description": "Timestamp at which the parcel left the warehouse"},
+        {"name": "returned", "type": "boolean", "description": "Whether any item of the order was returned within 30 days"},
+    ],
+)
+
+
+def verbose_prompt(schema: Schema, chunk_count: int) -> str:
+    return f"""
+            You are a JSON data generator for synthetic dataset creation.
+            Generate **realistic** and **domain-specific** synthetic records.
+
+            === SCHEMA ===
+            {schema.model_dump_json(indent=2)}
+
+            === RULES ===
+            - Generate exactly {chunk_count} records.
+            - Output only a **JSON array** of flat objects. Each object must strictly conform to the schema.
+            - Each record must include **all fields** from the schema. No missing or null values.
+            - Ensure strict type adherence: string, number, boolean, date (YYYY-MM-DD), datetime (ISO format).
+            - Use realistic and consistent values inferred from field names, types, and constraints.
+            - If a field represents a date, ensure the value is a valid and realistic date.
+            - Do **not** include markdown, headers, comments, or explanations.
+            - The output must be valid JSON and must start with `[` and end with `]`.
+
+            === EXAMPLE OUTPUT FORMAT ===
+            [
+            {{
+                "field_1": "value",
+                "field_2": 123,
+                ...
+            }},
+            ... (total {chunk_count} items)
+            ]
+            """
+
+
+def main(chunks: int):
+    verbose = verbose_prompt(SCHEMA, 20)
+    compact = ChunkPrompt(SCHEMA).render(20)
+    before, after = estimate_tokens(verbose), estimate_tokens(compact)
+    print(f"fields: {len(SCHEMA.fields)}, chunks per run: {chunks}")
+    print(f"verbose prompt: {len(verbose):6d} chars  ~{before:5d} tokens/call  ~{before * chunks:9d} tokens/run")
+    print(f"compact prompt: {len(compact):6d} chars  ~{after:5d} tokens/call  ~{after * chunks:9d} tokens/run")
+    print(f"input token reduction: {(1 - after / before) * 100:.1f} %")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,85 @@
+"""
+Benchmark: offline replay of a recorded generation run.
+
+Records one DataGeneratorAgent run through GeminiModel against a latency-injecting
+fake transport, then replays it with the transport disabled. Replayed runs pay no
+network time, so their wall time is the pipeline's local overhead; their outputs
+are compared byte for byte against the recorded run.
+
+Run from the repo root:
+    python -m benchmarks.bench_replay [rows] [replays]
+"""
+import sys
+import tempfile
+import time
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from agents.OutputFormatterAgent import OutputFormatterAgent
+from benchmarks.fake_llm import FakeGeminiModel, install
+from config import config
+from models.schemas import Schema
+from utils.gemini_model import GeminiModel
+from utils.rate_limiter import RateLimiter
+from utils.replay import RECORD, REPLAY, ReplayLayer, ResponseStore
+
+LATENCY = 0.05  # seconds per fake Gemini call while recording
+SEED = 7
+FORMATS = ("csv", "parquet", "excel")
+
+SCHEMA = Schema(
+    scenario="Members of a chain of climbing gyms with their home gym and membership details",
+    sample_size=1000,
+    fields=[
+        {"name": "member_name", "type": "string", "description": "Full name of the gym member"},
+        {"name": "home_gym", "type": "string", "description": "City of the gym the member signed up at"},
+        {"name": "age", "type": "number", "description": "Age of the member in years",
+         "constraints": "Between 16 and 70"},
+        {"name": "joined_on", "type": "date", "description": "Date the membership started",
+         "constraints": "Between 2015-01-01 and 2024-12-31"},
+        {"name": "active", "type": "boolean", "description": "Whether the membership is currently active"},
+    ],
+)
+
+
+def offline(*args, **kwargs):
+    raise RuntimeError("network access attempted during replay")
+
+
+def run(schema: Schema) -> tuple:
+    start = time.perf_counter()
+    records = DataGeneratorAgent(checkpoints=None).generate(schema, seed=SEED)
+    elapsed = time.perf_counter() - start
+    formatter = OutputFormatterAgent()
+    return elapsed, {fmt: formatter.format(records, fmt).file_content for fmt in FORMATS}
+
+
+def main(rows: int = 1000, replays: int = 3):
+    schema = SCHEMA.model_copy(update={"sample_size": rows})
+    config.SOURCE_DATE_EPOCH = 0
+    GeminiModel.limiter = RateLimiter()  # measure the pipeline, not the quota
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ResponseStore(root)
+        fake = FakeGeminiModel(latency=LATENCY)
+        install(fake)
+        GeminiModel.replay = ReplayLayer(store, RECORD)
+        recorded_time, recorded = run(schema)
+        print(f"rows:                     {rows}")
+        print(f"recorded run:             {recorded_time:8.3f} s  ({fake.calls} calls at {LATENCY * 1000:.0f} ms)")
+
+        GeminiModel.get_model = staticmethod(offline)
+        GeminiModel.replay = ReplayLayer(store, REPLAY)
+        times = []
+        for _ in range(replays):
+            elapsed, outputs = run(schema)
+            times.append(elapsed)
+            for fmt in FORMATS:
+                if outputs[fmt] != recorded[fmt]:
+                    raise SystemExit(f"replayed {fmt} output differs from the recorded run")
+        stats = GeminiModel.replay.stats()
+        print(f"replayed run (mean of {replays}): {sum(times) / len(times):8.3f} s  ({stats['hits']} hits, "
+              f"{stats['misses']} misses)")
+        print(f"byte-identical outputs:   {', '.join(FORMATS)}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
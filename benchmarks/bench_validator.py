@@ -0,0 +1,38 @@
+"""
+Benchmark: RecordValidator throughput on well-formed and coercible records.
+
+Run from the repo root:
+    python -m benchmarks.bench_validator [records]
+"""
+import sys
+import time
+from models.schemas import Schema
+from utils.record_validator import RecordValidator
+
+SCHEMA_FIELDS = [
+    {"name": "order_id", "type": "string", "description": "Unique order identifier from the shop"},
+    {"name": "amount", "type": "number", "description": "Order total in the shop's currency"},
+    {"name": "quantity", "type": "number", "description": "Number of items in the order"},
+    {"name": "is_gift", "type": "boolean", "description": "Whether the order was marked as a gift"},
+    {"name": "order_date", "type": "date", "description": "Calendar date the order was placed"},
+    {"name": "shipped_at", "type": "datetime", "description": "Timestamp the order left the warehouse"},
+]
+
+
+def main(count: int):
+    validator = RecordValidator(Schema(fields=SCHEMA_FIELDS, sample_size=100, scenario="Online shop orders for testing"))
+    clean = {"order_id": "A-1", "amount": 19.99, "quantity": 2, "is_gift": False,
+             "order_date": "2024-03-01", "shipped_at": "2024-03-02T10:15:00"}
+    coercible = {"order_id": 1001, "amount": "19.99", "quantity": "2", "is_gift": "yes",
+                 "order_date": "2024-03-01T00:00:00", "shipped_at": "2024-03-02T10:15:00Z"}
+
+    for label, record in (("clean", clean), ("coercible", coercible)):
+        batch = [record] * count
+        start = time.perf_counter()
+        valid, errors = validator.validate_batch(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{label:10s} {len(valid):>9} valid  {len(errors):>4} rejected  {count / elapsed:>12,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,156 @@
+"""
+Local stand-in for GeminiModel used by the benchmarks.
+
+It answers every prompt the pipeline sends (scenario cleaning, schema inference,
+field enrichment and generator chunks) with plausibly shaped replies, so agents and
+whole pipelines can be driven end to end without network access or an API key.
+
+Latency, transient failures and truncated replies can be injected to approximate a
+loaded Gemini endpoint.
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from types import SimpleNamespace
+from google.api_core import exceptions as api_exceptions
+
+_COUNT = re.compile(r"exactly (\d+) records")
+_FIELD = re.compile(r'"name":\s*"(\w+)",\s*"type":\s*"(\w+)"')
+_COMPACT_FIELD = re.compile(r"^- (\w+) \((\w+)\):", re.MULTILINE)  # utils.prompt_builder form
+_SCENARIO = re.compile(r"Refine this data generation scenario:\s*(.*?)\s*Rules:", re.DOTALL)
+_SAMPLE_SIZE = re.compile(r'"sample_size":\s*(\d+)')
+_ENRICH_FIELD = re.compile(r'data field named "(\w+)" of type "(\w+)"')
+
+# What schema inference "finds" in any scenario: a mix of locally synthesized
+# columns (UUID, ranged numbers/dates, booleans) and columns only the model can fill
+INFERRED_FIELDS = [
+    {"name": "customer_id", "type": "string", "description": "Unique customer identifier (UUID v4 format)",
+     "constraints": "Must be UUID v4 format, unique"},
+    {"name": "full_name", "type": "string", "description": "Customer full name as shown on the account"},
+    {"name": "email", "type": "string", "description": "Email address of the customer, used for login",
+     "constraints": "Valid email address, unique"},
+    {"name": "city", "type": "string", "description": "City of the customer's billing address"},
+    {"name": "lifetime_value", "type": "number", "description": "Total revenue attributed to the customer in euros",
+     "constraints": "Between 0 and 5000"},
+    {"name": "is_subscribed", "type": "boolean", "description": "Whether the customer receives the newsletter"},
+    {"name": "signup_date", "type": "date", "description": "Date the customer created their account",
+     "constraints": "Between 2018-01-01 and 2024-12-31"},
+    {"name": "last_login", "type": "datetime", "description": "Timestamp of the customer's most recent login"},
+]
+
+
+class FakeGeminiModel:
+    """
+    Exposes GeminiModel's generate/agenerate signature.
+
+    latency is the median seconds per call; with latency_sigma > 0 call times are
+    log-normal around it, giving the long tail real endpoints have. failure_rate is
+    the share of calls raising ServiceUnavailable (a transient error the retry policy
+    backs off on) and truncation_rate the share of replies cut off mid-array.
+    """
+
+    def __init__(self, latency: float = 0.0, seed: int = 0, latency_sigma: float = 0.0,
+                 failure_rate: float = 0.0, truncation_rate: float = 0.0):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.truncation_rate = truncation_rate
+        self.calls = 0
+        self.failures = 0
+        self.truncations = 0
+        self._serial = 0
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency
+        return self._random.lognormvariate(math.log(self.latency), self.latency_sigma)
+
+    def _value(self, name: str, field_type: str, i: int):
+        r = self._random
+        if field_type == "number":
+            return r.randint(1, 1000)
+        if field_type == "boolean":
+            return r.random() < 0.5
+        if field_type == "date":
+            return f"20{r.randint(10, 24)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}"
+        if field_type == "datetime":
+            return f"20{r.randint(10, 24)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}T{r.randint(0, 23):02d}:00:00"
+        if "email" in name:
+            self._serial += 1
+            return f"user{self._serial}@example.com"
+        return f"value_{r.choice('abcdefgh')}_{i % 7}"
+
+    def _records(self, prompt: str, count: int) -> str:
+        fields = _FIELD.findall(prompt) or _COMPACT_FIELD.findall(prompt)
+        if not fields:
+            return "[]"
+        text = json.dumps([
+            {name: self._value(name, field_type, i) for name, field_type in fields}
+            for i in range(count)
+        ])
+        if self.truncation_rate and self._random.random() < self.truncation_rate:
+            self.truncations += 1
+            # Cut somewhere past the first record, as max_output_tokens would
+            return text[:self._random.randint(len(text) // (count + 1) + 1, len(text) - 1)]
+        return text
+
+    def respond(self, prompt: str) -> str:
+        self.calls += 1
+        count = _COUNT.search(prompt)
+        if count:
+            return self._records(prompt, int(count.group(1)))
+        if "data schema generator" in prompt:
+            size = _SAMPLE_SIZE.search(prompt)
+            return json.dumps({"fields": INFERRED_FIELDS, "sample_size": int(size.group(1)) if size else 100})
+        field = _ENRICH_FIELD.search(prompt)
+        if field:
+            name = field.group(1)
+            return json.dumps({
+                "description": f"The {name.replace('_', ' ')} recorded for each entity in the scenario",
+                "constraints": None,
+                "example": str(self._value(name, field.group(2), 0)),
+            })
+        scenario = _SCENARIO.search(prompt)
+        if scenario:
+            return scenario.group(1)
+        return "{}"
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise api_exceptions.ServiceUnavailable("injected failure")
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        time.sleep(self._delay())
+        self._maybe_fail()
+        return self.respond(prompt)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        return self.respond(prompt)
+
+
+class FakeGenerativeModel:
+    """Stands in for genai.GenerativeModel, so GeminiModel's own code path still runs"""
+
+    def __init__(self, fake: FakeGeminiModel):
+        self.fake = fake
+
+    def generate_content(self, prompt: str):
+        return SimpleNamespace(text=self.fake.generate(prompt), usage_metadata=None)
+
+    async def generate_content_async(self, prompt: str):
+        return SimpleNamespace(text=await self.fake.agenerate(prompt), usage_metadata=None)
+
+
+def install(fake: FakeGeminiModel) -> None:
+    """Routes every GeminiModel call in the process (limiter, retries, replay included) to fake"""
+    from utils.gemini_model import GeminiModel
+    GeminiModel.get_model = staticmethod(lambda *args, **kwargs: FakeGenerativeModel(fake))
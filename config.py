@@ -1,11 +1,47 @@
 import os
+from typing import List, Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     GEMINI_API_KEY: str
-    MAX_RETRIES: int = 2
+    MAX_RETRIES: int = 2  # transport retries per Gemini call on throttling / transient errors
+    RETRY_BASE_DELAY: float = 0.5  # backoff base (seconds) for transient errors, doubled per attempt
+    RETRY_THROTTLE_DELAY: float = 5.0  # backoff base for 429 / quota errors
+    RETRY_MAX_DELAY: float = 30.0
     DEFAULT_MODEL: str = "gemini-1.5-flash"
-    
+    MAX_CONCURRENT_CHUNKS: int = 8  # Gemini calls in flight per generation run
+    GEMINI_RPM: Optional[int] = 1000  # process-wide quota shared by every Gemini call; None disables
+    GEMINI_TPM: Optional[int] = 4000000
+    GEMINI_MAX_CONCURRENT: Optional[int] = 32  # Gemini calls in flight across all runs
+    ADAPTIVE_CHUNKING: bool = True  # tune records per call (AIMD) from observed response sizes
+    CHUNK_MAX_OUTPUT_TOKENS: int = 2000
+    TARGET_TRUNCATION_RATE: float = 0.05
+    MAX_LLM_ROWS: int = 10000  # row cap for LLM-generated fields without amplification
+    LOCAL_SYNTHESIS: bool = True  # generate booleans, UUIDs and ranged numbers/dates without the LLM
+    GENERATION_SEED: Optional[int] = None  # seed for local synthesis; None draws a fresh one per run
+    AMPLIFY_ABOVE_ROWS: Optional[int] = 10000  # larger runs grow an LLM seed set locally; None disables
+    AMPLIFY_SEED_ROWS: int = 50
+    UNIQUE_INDEX_BLOOM_ABOVE: int = 1000000  # runs larger than this index unique keys in Bloom filters
+    UNIQUE_INDEX_FALSE_POSITIVE_RATE: float = 0.001
+    CACHE_MAX_ENTRIES: int = 1024  # in-memory LRU tier for cleaned scenarios / schemas, 0 disables
+    CACHE_TTL_SECONDS: int = 86400
+    CACHE_DB_PATH: Optional[str] = None  # set to enable the on-disk SQLite tier
+    CACHE_DB_MAX_ENTRIES: int = 10000
+    LLM_REPLAY_MODE: Optional[Literal["record", "replay", "auto"]] = None  # record/replay Gemini responses; None disables
+    LLM_REPLAY_DIR: str = "llm_recordings"
+    SOURCE_DATE_EPOCH: Optional[int] = None  # pins file metadata timestamps (Excel "created") for byte-identical output
+    CHECKPOINT_DB_PATH: Optional[str] = "checkpoints.db"  # completed chunks of runs with a run_id; None disables
+    CHECKPOINT_TTL_SECONDS: Optional[int] = 7 * 86400  # unfinished runs older than this are purged; None keeps them
+    APPROVAL_MODE: Literal["manual", "auto"] = "manual"  # auto approves every schema without a reviewer
+    APPROVAL_TIMEOUT_SECONDS: float = 60  # how long a schema waits for a reviewer's decision
+    APPROVAL_TIMEOUT_APPROVES: bool = True  # decision applied when nobody answers in time
+    APPROVAL_TRUSTED_TOKENS: List[str] = []  # X-Approval-Token values whose requests skip review
+    APPROVAL_REVIEWER_TOKENS: List[str] = []  # X-Approval-Token values allowed to list and decide approvals
+    APPROVAL_AUTO_MAX_ROWS: Optional[int] = None  # runs up to this many rows skip review; None disables
+    JOBS_DB_PATH: str = "jobs.db"  # SQLite store backing the async /jobs API
+    JOBS_RESULT_DIR: str = "job_results"
+    JOB_WORKERS: int = 2  # generation jobs run concurrently; the rest wait queued
+
     class Config:
         env_file = ".env"
 
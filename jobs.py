@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from agents.OutputFormatterAgent import OutputFormatterAgent
+from config import config
+from models.schemas import GenerationRequest, Schema
+from utils.job_store import JobStore
+from utils.metrics import record_output, timed_step, track_run
+
+logger = logging.getLogger(__name__)
+
+RESULT_EXTENSIONS = {"json": "json", "csv": "csv", "excel": "xlsx", "parquet": "parquet", "arrow": "arrow"}
+
+
+class JobRunner:
+    """
+    Background worker pool for generation jobs.
+
+    submit() only records the job and queues it; `workers` asyncio tasks take jobs
+    off the queue, run scenario → schema → approval through `setup`, then stream the
+    generator straight into the job's result file while recording progress.
+
+    The job id doubles as the generator's checkpoint run id, so jobs interrupted by a
+    restart are requeued by start() and pick up from their last completed chunks.
+    """
+
+    def __init__(self, setup: Callable[[GenerationRequest, Optional[str]], Awaitable[Schema]],
+                 store: Optional[JobStore] = None, generator: Optional[DataGeneratorAgent] = None,
+                 formatter: Optional[OutputFormatterAgent] = None, workers: int = config.JOB_WORKERS,
+                 result_dir: str = config.JOBS_RESULT_DIR):
+        self.setup = setup
+        self.store = store or JobStore(config.JOBS_DB_PATH)
+        self.generator = generator or DataGeneratorAgent()
+        self.formatter = formatter or OutputFormatterAgent()
+        self.workers = workers
+        self.result_dir = result_dir
+        self._queue: Optional[asyncio.Queue] = None
+        # Approval tokens stay in memory only; a job requeued after a restart goes through review
+        self._callers: Dict[str, str] = {}
+        self._tasks = []
+        self._loop = None
+
+    async def start(self) -> None:
+        """Starts the workers and requeues jobs a previous process left unfinished"""
+        if self._ensure_workers():
+            pending = await asyncio.to_thread(self.store.requeue_unfinished)
+            if pending:
+                logger.info(f"[JobRunner] Resuming {len(pending)} unfinished job(s)")
+            for job_id in pending:
+                self._queue.put_nowait(job_id)
+
+    def _ensure_workers(self) -> bool:
+        # Workers are bound to the event loop serving requests, which only exists once the app starts
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return False
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._worker(i)) for i in range(self.workers)]
+        return True
+
+    async def submit(self, request: GenerationRequest, caller: Optional[str] = None) -> str:
+        self._ensure_workers()
+        job_id = await asyncio.to_thread(self.store.create, request.model_dump(mode="json"), request.output_format)
+        if caller is not None:
+            self._callers[job_id] = caller
+        await self._queue.put(job_id)
+        logger.info(f"[JobRunner] Queued job {job_id} ({request.output_format}, {request.sample_size} rows)")
+        return job_id
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.exception(f"[JobRunner] Job {job_id} failed")
+                await asyncio.to_thread(self.store.update, job_id, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        with track_run() as run:
+            path = await self._execute(job_id)
+        await asyncio.to_thread(self.store.update, job_id, status="completed", result_path=path)
+        logger.info(f"[JobRunner] Job {job_id} completed: {path} ({run.message()})")
+
+    async def _execute(self, job_id: str) -> str:
+        """Generates the job's result file and returns its path"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        request = GenerationRequest(**job["request"])
+        caller = self._callers.pop(job_id, None)
+        await asyncio.to_thread(self.store.update, job_id, status="running")
+
+        checkpoints = self.generator.checkpoints
+        # A resumed job must continue with the schema its checkpoints were made for
+        schema = await asyncio.to_thread(checkpoints.load_schema, job_id) if checkpoints else None
+        if schema is None:
+            schema = await self.setup(request, caller)
+        await asyncio.to_thread(self.store.update, job_id, rows_total=schema.sample_size)
+
+        os.makedirs(self.result_dir, exist_ok=True)
+        path = os.path.join(self.result_dir, f"{job_id}.{RESULT_EXTENSIONS[request.output_format]}")
+        chunks = self._track(job_id, schema.sample_size, self.generator.astream(schema, run_id=job_id, seed=request.seed))
+        try:
+            with timed_step("generate_data"), open(path, "wb") as result:
+                if request.output_format == "json":
+                    await self._write_json(result, chunks)
+                else:
+                    await self.formatter.write_to(result, chunks, request.output_format, schema.fields,
+                                                  request.compression)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    async def _track(self, job_id: str, total: int, chunks: AsyncIterator[list]) -> AsyncIterator[list]:
+        """Passes chunks through, recording rows/chunks done and a running estimate of chunks total"""
+        rows = done = 0
+        async for chunk in chunks:
+            rows += len(chunk)
+            done += 1
+            remaining = max(0, total - rows)
+            estimate = done + -(-remaining // len(chunk)) if chunk else done
+            await asyncio.to_thread(self.store.update, job_id, rows_done=rows, chunks_done=done,
+                                    chunks_total=estimate)
+            yield chunk
+
+    async def _write_json(self, fileobj, chunks: AsyncIterator[list]) -> None:
+        """Same shape as the GeneratedData body of /generate, written record by record"""
+        fileobj.write(b'{"data": [')
+        first = True
+        rows = 0
+        async for chunk in chunks:
+            for record in chunk:
+                fileobj.write((b"" if first else b", ") + json.dumps(record).encode("utf-8"))
+                first = False
+            rows += len(chunk)
+        fileobj.write(b'], "format": "json", "message": null}')
+        record_output("json", rows, fileobj.tell())
@@ -2,6 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes import router
 from utils.gemini_model import GeminiModel
+from utils.sio_server import sio
+import socketio
 import uvicorn
 import logging
 
@@ -15,7 +17,7 @@ logging.basicConfig(
     ]
 )
 
-def create_app() -> FastAPI:
+def create_app() -> socketio.ASGIApp:
     app = FastAPI(
         title="Synthetic Data Generator",
         description="API for generating synthetic data using Gemini AI",
@@ -37,7 +39,8 @@ def create_app() -> FastAPI:
     # Mount routes
     app.include_router(router)
 
-    return app
+    # Reviewers connect over Socket.IO (/socket.io/); everything else goes to FastAPI
+    return socketio.ASGIApp(sio, other_asgi_app=app)
 
 # Single instance
 app = create_app()
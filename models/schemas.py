@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, constr, field_validator
+from pydantic import BaseModel, Field, constr, field_validator, model_validator
 from typing import Annotated, List, Dict, Optional, Literal
 from enum import Enum
 
@@ -44,8 +44,8 @@ class Schema(BaseModel):
     sample_size: int = Field(
         default=100,
         gt=0,
-        le=10000,
-        description="Number of records to generate (1-10,000)"
+        le=1000000,
+        description="Number of records to generate (1-1,000,000; up to 10,000 when fields need the LLM)"
     )
     scenario: Annotated[str, Field(..., min_length=20, description="Description of the data generation scenario")]
 
@@ -60,10 +60,31 @@ class GenerationRequest(BaseModel):
         default=100,
         description="Number of records to generate"
     )
-    output_format: Literal["json", "csv", "excel"] = Field(
+    output_format: Literal["json", "csv", "excel", "parquet", "arrow"] = Field(
         default="json",
         description="Output file format"
     )
+    compression: Optional[Literal["none", "snappy", "gzip", "brotli", "lz4", "zstd"]] = Field(
+        default=None,
+        description="Compression codec for parquet (default zstd) or arrow (lz4/zstd, default none) output"
+    )
+    run_id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        description="Checkpoint key; resubmitting a failed request with its run_id reuses the chunks it completed"
+    )
+    seed: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Seed for locally generated values; with replayed responses the output is byte-identical"
+    )
+
+    @model_validator(mode="after")
+    def validate_compression(self):
+        # Checked here so a bad codec is rejected before any generation starts
+        if self.output_format == "arrow" and self.compression not in (None, "none", "lz4", "zstd"):
+            raise ValueError(f"Arrow IPC supports only lz4 or zstd compression, got {self.compression}")
+        return self
 
 class GeneratedData(BaseModel):
     data: Optional[List[Dict]] = Field(
@@ -72,7 +93,7 @@ class GeneratedData(BaseModel):
     )
     file_content: Optional[bytes] = Field(
         None,
-        description="Binary file content for CSV/Excel outputs"
+        description="Binary file content for file outputs (the HTTP API sends files as raw downloads instead)"
     )
     format: str
     message: Optional[str] = Field(
@@ -80,6 +101,27 @@ class GeneratedData(BaseModel):
         description="Status message or instructions"
     )
 
+class JobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    output_format: str
+    rows_done: int = 0
+    rows_total: Optional[int] = Field(None, description="Known once the schema is approved")
+    chunks_done: int = 0
+    chunks_total: Optional[int] = Field(None, description="Estimate; chunk sizes adapt during the run")
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+class PendingApprovalInfo(BaseModel):
+    schema_id: str
+    schema_def: Schema
+    created_at: float
+
+class ApprovalDecision(BaseModel):
+    approved: bool
+    schema_def: Optional[Schema] = Field(None, description="Edited schema to generate with instead of the proposed one")
+
 # Additional models for the update request
 class FieldUpdate(BaseModel):
     name: str
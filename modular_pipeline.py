@@ -1,3 +1,5 @@
+import asyncio
+import uuid
 from langgraph.graph import StateGraph, Graph, END
 from typing import Any, TypedDict, Annotated, Optional, Dict, List
 
@@ -12,6 +14,7 @@ from agents.PreprocessingAgent import PreprocessingAgent
 from agents.FieldInferenceAgent import FieldInferenceAgent
 from agents.DataGeneratorAgent import DataGeneratorAgent
 from agents.OutputFormatterAgent import OutputFormatterAgent
+from utils.metrics import instrument_node
 
 import logging
 
@@ -25,6 +28,7 @@ class AgentState(TypedDict):
     schema: Annotated[Optional[Schema], "Inferred schema"]
     generated_data: Annotated[Optional[list], "Generated data"]
     output: Annotated[Optional[GeneratedData], "Formatted output"]
+    run_id: Annotated[Optional[str], "Checkpoint key of the generation run"]
     error: Annotated[Optional[str], "Error message if any"]
 
 class Pipeline:
@@ -53,16 +57,13 @@ class Pipeline:
         workflow.add_node("format_output", self._format_output)
         workflow.add_node("error_handler", self._handle_error)
 
-        # Entry point
-        workflow.set_entry_point("preprocess")
+        workflow.add_node("resume", self._resume)
 
-        # Main path
-        workflow.add_edge("preprocess", "infer_fields")
-        workflow.add_edge("infer_fields", "generate_data")
-        workflow.add_edge("generate_data", "format_output")
-        workflow.add_edge("format_output", END)
+        # Entry point
+        workflow.set_entry_point("resume")
+        workflow.add_conditional_edges("resume", lambda s: "generate_data" if s.get("schema") else "preprocess")
 
-        # Conditional error handling
+        # Main path with error handling; each step routes only through its conditional edge
         for node in ["preprocess", "infer_fields", "generate_data", "format_output"]:
             workflow.add_conditional_edges(
                 node,
@@ -74,6 +75,8 @@ class Pipeline:
                 }[n]
             )
 
+        workflow.add_edge("error_handler", END)
+
         logger.info("Full workflow graph successfully built.")
         return workflow.compile()
 
@@ -169,16 +172,20 @@ class Pipeline:
     async def generate_data(
         self,
         schema: Schema,
-        output_format: str = "json"
+        output_format: str = "json",
+        run_id: Optional[str] = None,
+        seed: Optional[int] = None
     ) -> GeneratedData:
-        """Generate data from finalized schema"""
+        """Generate data from finalized schema; pass a failed run's run_id to resume it"""
         try:
             generated = await self._generate_data({
                 "schema": schema,
+                "run_id": run_id,
                 "request": GenerationRequest(
                     scenario=schema.scenario,  # Not needed for generation
                     sample_size=schema.sample_size,
-                    output_format=output_format
+                    output_format=output_format,
+                    seed=seed
                 )
             })
             
@@ -186,7 +193,8 @@ class Pipeline:
                 raise ValueError(generated["error"])
             
             formatted = await self._format_output({
-                "generated_data": generated["generated_data"],
+                "generated_data": generated.get("generated_data"),
+                "output": generated.get("output"),
                 "request": GenerationRequest(
                     scenario=schema.scenario, 
                     sample_size=schema.sample_size,
@@ -205,7 +213,7 @@ class Pipeline:
     async def run_full_pipeline(self, request: GenerationRequest) -> GeneratedData:
         """Run the complete end-to-end pipeline (legacy support)"""
         try:
-            result =  self.graph.invoke({"request": request})
+            result = await self.graph.ainvoke({"request": request})
             if result.get("error"):
                 raise ValueError(result["error"])
             return result["output"]
@@ -214,22 +222,34 @@ class Pipeline:
             raise RuntimeError(f"Pipeline execution error: {str(e)}")
 
     # Internal step implementations
+    async def _resume(self, state: AgentState) -> AgentState:
+        """A run_id with checkpoints skips preprocessing and inference; _generate_data uses their schema"""
+        run_id = state["request"].run_id
+        checkpoints = self.agents["data_generator"].checkpoints
+        schema = await asyncio.to_thread(checkpoints.load_schema, run_id) if run_id and checkpoints else None
+        if schema is None:
+            return state
+        logger.info(f"Step: Resuming run {run_id} with its checkpointed schema...")
+        return {**state, "schema": schema, "run_id": run_id, "error": None}
+
+    @instrument_node("preprocess")
     async def _preprocess(self, state: AgentState) -> AgentState:
         try:
             logger.info("Step: Preprocessing input scenario...")
-            cleaned = self.agents["preprocessor"].clean(state["request"].scenario)
+            cleaned = await self.agents["preprocessor"].aclean(state["request"].scenario)
             logger.debug(f"Cleaned Scenario: {cleaned}")
             return {**state,"cleaned_scenario": cleaned, "error": None}
         except Exception as e:
             logger.exception("Preprocessing failed")
             return {**state,"error": f"Preprocessing error: {e}"}
 
+    @instrument_node("infer_fields")
     async def _infer_fields(self, state: AgentState) -> AgentState:
         if state.get("error"):
             return state
         try:
             logger.info("Step: Inferring schema from cleaned scenario...")
-            schema_dict = self.agents["field_inferrer"].infer_schema(
+            schema_dict = await self.agents["field_inferrer"].ainfer_schema(
                 scenario=state["cleaned_scenario"],
                 sample_size=state["request"].sample_size
             )
@@ -253,25 +273,45 @@ class Pipeline:
             logger.exception("Field inference failed")
             return {**state,"error": f"Field inference error: {e}"}
 
+    @instrument_node("generate_data")
     async def _generate_data(self, state: AgentState) -> AgentState:
         if state.get("error"):
             return state
+        # Completed chunks are checkpointed under run_id; re-invoking with it resumes the run
+        run_id = state.get("run_id") or state["request"].run_id or uuid.uuid4().hex
         try:
             logger.info("Step: Generating synthetic data...")
-            data = self.agents["data_generator"].generate(state["schema"])
-            return {**state,"generated_data": data, "error": None}
+            # A resumed run continues with the schema its checkpoints were made for
+            checkpoints = self.agents["data_generator"].checkpoints
+            schema = await asyncio.to_thread(checkpoints.load_schema, run_id) if checkpoints else None
+            schema = schema or state["schema"]
+            output_format = state["request"].output_format
+            if output_format in self.agents["output_formatter"].writers:
+                # File formats are written chunk by chunk instead of materializing the dataset
+                formatted = await self.agents["output_formatter"].write_stream(
+                    self.agents["data_generator"].astream(schema, run_id, state["request"].seed),
+                    output_format,
+                    schema.fields,
+                    compression=state["request"].compression
+                )
+                return {**state, "output": formatted, "run_id": run_id, "error": None}
+            data = await self.agents["data_generator"].agenerate(schema, run_id, state["request"].seed)
+            return {**state,"generated_data": data, "run_id": run_id, "error": None}
         except Exception as e:
             logger.exception("Data generation failed")
-            return {**state,"error": f"Data generation error: {e}"}
+            return {**state, "run_id": run_id, "error": f"Data generation error: {e} (resume with run_id {run_id})"}
 
+    @instrument_node("format_output")
     async def _format_output(self, state: AgentState) -> AgentState:
-        if state.get("error"):
+        if state.get("error") or state.get("output") is not None:
             return state
         try:
             logger.info("Step: Formatting generated data for output...")
-            formatted = self.agents["output_formatter"].format(
+            formatted = await asyncio.to_thread(
+                self.agents["output_formatter"].format,
                 state["generated_data"],
-                state["request"].output_format
+                state["request"].output_format,
+                state["request"].compression
             )
             logger.debug(f"Formatted Output: {formatted}")
             return {**state,"output": formatted, "error": None}
@@ -1,3 +1,5 @@
+import asyncio
+import uuid
 from langgraph.graph import StateGraph, END
 from typing import TypedDict, Annotated, Optional
 from models.schemas import GenerationRequest, GeneratedData, Schema
@@ -6,6 +8,7 @@ from agents.DataGeneratorAgent import DataGeneratorAgent
 from agents.OutputFormatterAgent import OutputFormatterAgent
 from agents.PreprocessingAgent import PreprocessingAgent
 from agents.HumanInteractionAgent import ApprovalResult, HumanInteractionAgent
+from utils.metrics import instrument_node
 
 import logging
 
@@ -19,9 +22,17 @@ class AgentState(TypedDict):
     validated_schema: Annotated[Optional[ApprovalResult], "Approval result"]
     generated_data: Annotated[Optional[list], "Generated data"]
     output: Annotated[Optional[GeneratedData], "Formatted output"]
+    run_id: Annotated[Optional[str], "Checkpoint key of the generation run"]
+    caller: Annotated[Optional[str], "Approval token presented by the caller"]
     error: Annotated[Optional[str], "Error message if any"]
 
-def create_pipeline() -> StateGraph:
+def create_pipeline(stop_after: Optional[str] = None) -> StateGraph:
+    """
+    Builds the generation graph.
+
+    stop_after ends the graph after the named node (e.g. "get_approval" for
+    callers that stream generation themselves) instead of running to format_output.
+    """
     logger.info("Initializing pipeline agents...")
 
     agents = {
@@ -34,21 +45,34 @@ def create_pipeline() -> StateGraph:
 
     workflow = StateGraph(AgentState)
 
-    def preprocess(state: AgentState) -> AgentState:
+    async def resume(state: AgentState) -> AgentState:
+        """A run_id with checkpoints continues with the schema they were made for: no inference or review"""
+        run_id = state["request"].run_id
+        checkpoints = agents["data_generator"].checkpoints
+        schema = await asyncio.to_thread(checkpoints.load_schema, run_id) if run_id and checkpoints else None
+        if schema is None:
+            return state
+        logger.info(f"Step: Resuming run {run_id} with its checkpointed schema...")
+        return {**state, "schema": schema, "validated_schema": ApprovalResult(approved=True, schema_def=schema),
+                "run_id": run_id, "error": None}
+
+    @instrument_node("preprocess")
+    async def preprocess(state: AgentState) -> AgentState:
         try:
             logger.info("Step: Preprocessing input scenario...")
-            cleaned = agents["preprocessor"].clean(state["request"].scenario)
+            cleaned = await agents["preprocessor"].aclean(state["request"].scenario)
             return {**state, "cleaned_scenario": cleaned, "error": None}
         except Exception as e:
             logger.exception("Preprocessing failed")
             return {**state, "error": f"Preprocessing error: {e}"}
 
-    def infer_fields(state: AgentState) -> AgentState:
+    @instrument_node("infer_fields")
+    async def infer_fields(state: AgentState) -> AgentState:
         if state.get("error"):
             return state
         try:
             logger.info("Step: Inferring schema from cleaned scenario...")
-            schema_dict = agents["field_inferrer"].infer_schema(
+            schema_dict = await agents["field_inferrer"].ainfer_schema(
                 scenario=state["cleaned_scenario"],
                 sample_size=state["request"].sample_size,
             )
@@ -66,41 +90,59 @@ def create_pipeline() -> StateGraph:
             logger.exception("Field inference failed")
             return {**state, "error": f"Field inference error: {e}"}
 
+    @instrument_node("get_approval")
     async def get_approval(state: AgentState) -> AgentState:
         if state.get("error"):
             return state
         try:
             logger.info("Step: Getting human approval for schema...")
-            approval = await agents["human_approver"].get_approval(state["schema"])
+            approval = await agents["human_approver"].get_approval(state["schema"], state.get("caller"))
             logger.debug(f"Approval Result: {approval}")
             return {**state, "validated_schema": approval, "error": None}
         except Exception as e:
             logger.exception("Human approval failed")
             return {**state, "error": f"Approval error: {e}"}
 
-    def generate_data(state: AgentState) -> AgentState:
+    @instrument_node("generate_data")
+    async def generate_data(state: AgentState) -> AgentState:
         if state.get("error") or not state.get("validated_schema") or not state["validated_schema"].approved:
             logger.warning("Skipping data generation due to prior error or disapproval.")
             return state
+        # Completed chunks are checkpointed under run_id; re-invoking with it resumes the run
+        run_id = state.get("run_id") or state["request"].run_id or uuid.uuid4().hex
         try:
             logger.info("Step: Generating synthetic data...")
             schema_def = state["validated_schema"].schema_def
             logger.info(f"Generating {schema_def.sample_size} records...")  # ✅ Correct size
-            data = agents["data_generator"].generate(schema_def)
-            return {**state, "generated_data": data, "error": None}
+            output_format = state["request"].output_format
+            if output_format in agents["output_formatter"].writers:
+                # File formats are written chunk by chunk instead of materializing the dataset
+                formatted = await agents["output_formatter"].write_stream(
+                    agents["data_generator"].astream(schema_def, run_id, state["request"].seed),
+                    output_format,
+                    schema_def.fields,
+                    compression=state["request"].compression
+                )
+                return {**state, "output": formatted, "run_id": run_id, "error": None}
+            data = await agents["data_generator"].agenerate(schema_def, run_id, state["request"].seed)
+            return {**state, "generated_data": data, "run_id": run_id, "error": None}
         except Exception as e:
             logger.exception("Data generation failed")
-            return {**state, "error": f"Data generation error: {e}"}
+            return {**state, "run_id": run_id, "error": f"Data generation error: {e} (resume with run_id {run_id})"}
 
 
-    def format_output(state: AgentState) -> AgentState:
-        if state.get("error"):
+    @instrument_node("format_output")
+    async def format_output(state: AgentState) -> AgentState:
+        if state.get("error") or state.get("output") is not None:
             return state
         try:
             logger.info("Step: Formatting output...")
-            formatted = agents["output_formatter"].format(
+            # pandas/xlsxwriter work is CPU-bound: keep it off the event loop
+            formatted = await asyncio.to_thread(
+                agents["output_formatter"].format,
                 state["generated_data"],
-                state["request"].output_format
+                state["request"].output_format,
+                state["request"].compression
             )
             return {**state, "output": formatted, "error": None}
         except Exception as e:
@@ -119,35 +161,44 @@ def create_pipeline() -> StateGraph:
             "error": None
         }
 
+    nodes = {
+        "preprocess": preprocess,
+        "infer_fields": infer_fields,
+        "get_approval": get_approval,
+        "generate_data": generate_data,
+        "format_output": format_output,
+    }
+    steps = list(nodes)
+    if stop_after is not None:
+        steps = steps[:steps.index(stop_after) + 1]
+
     # Register nodes
-    workflow.add_node("preprocess", preprocess)
-    workflow.add_node("infer_fields", infer_fields)
-    workflow.add_node("get_approval", get_approval)
-    workflow.add_node("generate_data", generate_data)
-    workflow.add_node("format_output", format_output)
+    for name in steps:
+        workflow.add_node(name, nodes[name])
     workflow.add_node("error_handler", handle_error)
 
-    workflow.set_entry_point("preprocess")
-
-    workflow.add_edge("preprocess", "infer_fields")
-    workflow.add_edge("infer_fields", "get_approval")
-    workflow.add_edge("get_approval", "generate_data")
-    workflow.add_edge("generate_data", "format_output")
-    workflow.add_edge("format_output", END)
+    if "generate_data" in steps:
+        workflow.add_node("resume", resume)
+        workflow.set_entry_point("resume")
+        workflow.add_conditional_edges(
+            "resume", lambda s: "generate_data" if s.get("validated_schema") else "preprocess"
+        )
+    else:
+        workflow.set_entry_point("preprocess")
 
-    # Conditional error routing
-    for node in ["preprocess", "infer_fields", "get_approval", "generate_data", "format_output"]:
+    # Each step routes on its own outcome: error, rejected schema or the next step.
+    # A plain edge alongside would run the successor as well.
+    for name, successor in zip(steps, steps[1:] + [END]):
         workflow.add_conditional_edges(
-            node,
-            lambda s, n=node: "error_handler" if s.get("error") else {
-                "preprocess": "infer_fields",
-                "infer_fields": "get_approval",
-                "get_approval": "generate_data" if s.get("validated_schema") and s["validated_schema"].approved else END,
-                "generate_data": "format_output",
-                "format_output": END
-            }[n]
+            name,
+            lambda s, n=name, nxt=successor: "error_handler" if s.get("error") else (
+                END if n == "get_approval" and not (s.get("validated_schema") and s["validated_schema"].approved)
+                else nxt
+            )
         )
 
+    workflow.add_edge("error_handler", END)
+
     logger.info("✅ Pipeline graph successfully compiled.")
     return workflow.compile()
 
@@ -163,6 +214,8 @@ class Pipeline:
             result = await self.graph.ainvoke({"request": request})
             if result.get("error"):
                 raise ValueError(result["error"])
+            if result.get("output") is None:
+                raise ValueError("Schema was not approved")
             return result["output"]
         except Exception as e:
             logger.exception("Full pipeline execution failed")
@@ -1,6 +1,19 @@
-from fastapi import APIRouter, HTTPException, status
-from models.schemas import GenerationRequest, Schema, GeneratedData
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from typing import BinaryIO, Iterator, List, Literal, Optional
+from models.schemas import (
+    GenerationRequest, Schema, GeneratedData, JobStatus, PendingApprovalInfo, ApprovalDecision
+)
 from pipeline import create_pipeline
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from agents.OutputFormatterAgent import OutputFormatterAgent
+from jobs import JobRunner
+from agents.HumanInteractionAgent import approval_registry, is_reviewer
+from utils.gemini_model import GeminiModel
+from utils.metrics import timed_step, track_run
+import asyncio
+import json
 import logging
 
 router = APIRouter(
@@ -11,25 +24,103 @@ router = APIRouter(
 
 # ✅ Create graph instance
 graph = create_pipeline()
+# Preview ends after schema inference: no approval wait, no generation
+preview_graph = create_pipeline(stop_after="infer_fields")
+# Streaming runs the graph up to approval, then drives the generator itself
+approval_graph = create_pipeline(stop_after="get_approval")
+stream_generator = DataGeneratorAgent()
+stream_formatter = OutputFormatterAgent()
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+# (media type, file extension) of the file output formats, sent as raw downloads
+FILE_TYPES = {
+    "csv": ("text/csv", "csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
 
 logger = logging.getLogger(__name__)
 
+
+def raise_for_state(state: dict, approval_required: bool = True) -> None:
+    """Raises ValueError for a graph run that failed or whose schema was rejected"""
+    if state.get("error"):
+        raise ValueError(state["error"])
+    if state.get("output") is not None and state["output"].format == "error":
+        raise ValueError(state["output"].message)
+    approval = state.get("validated_schema")
+    if approval_required and (not approval or not approval.approved):
+        raise ValueError("Schema was not approved")
+
+
+async def run_until_approval(request: GenerationRequest, caller: Optional[str] = None) -> Schema:
+    """Runs scenario → schema → approval and returns the approved schema"""
+    state = await approval_graph.ainvoke({"request": request, "caller": caller})
+    raise_for_state(state)
+    return state["validated_schema"].schema_def
+
+
+async def approved_schema(request: GenerationRequest, caller: Optional[str] = None) -> Schema:
+    """The schema a request's run_id was checkpointed with, so a resume skips inference and review"""
+    checkpoints = stream_generator.checkpoints
+    if request.run_id and checkpoints is not None:
+        schema = await asyncio.to_thread(checkpoints.load_schema, request.run_id)
+        if schema is not None:
+            logger.info(f"Resuming run {request.run_id} with its checkpointed schema")
+            return schema
+    return await run_until_approval(request, caller)
+
+
+def failure_detail(error: Exception, request: GenerationRequest) -> str:
+    return f"{error} (resume with run_id {request.run_id})" if request.run_id else str(error)
+
+
+# Long generations go through the job API instead of holding a request open
+job_runner = JobRunner(setup=run_until_approval, generator=stream_generator, formatter=stream_formatter)
+router.add_event_handler("startup", job_runner.start)
+
+
+def iter_file(fileobj: BinaryIO) -> Iterator[bytes]:
+    """Reads a spooled output file in blocks and closes it once sent (or the client drops)"""
+    try:
+        while block := fileobj.read(DOWNLOAD_BLOCK_SIZE):
+            yield block
+    finally:
+        fileobj.close()
+
+
 @router.post(
     "/generate",
     response_model=GeneratedData,
     summary="Run full synthetic data generation pipeline",
-    description="Run full pipeline: scenario → schema → approval → data → output",
-    status_code=status.HTTP_200_OK
+    description=(
+        "Run full pipeline: scenario → schema → approval → data → output. "
+        "json returns GeneratedData; file formats are returned as a raw file download"
+    ),
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"content": {media_type: {} for media_type, _ in FILE_TYPES.values()}}
+    }
 )
-async def generate_data(request: GenerationRequest) -> GeneratedData:
+async def generate_data(
+    request: GenerationRequest,
+    response: Response,
+    approval_token: Optional[str] = Header(None, alias="X-Approval-Token", description="Skips schema review if trusted")
+):
+    if request.output_format in FILE_TYPES:
+        return await download_data(request, approval_token)
     try:
         logger.info(f"🔁 Running full generation pipeline for scenario: {request.scenario[:60]}")
-        # ✅ Use ainvoke for async pipeline
-        result = await graph.ainvoke({"request": request})
-        
-        if result.get("error"):
-            raise ValueError(result["error"])
-        
+        with track_run() as run:
+            # ✅ Use ainvoke for async pipeline
+            result = await graph.ainvoke({"request": request, "caller": approval_token})
+        raise_for_state(result)
+
+        # Timings go in headers only: the body must stay byte-identical under replay
+        response.headers.update(run.headers())
+        logger.info(f"Generation finished: {run.message()}")
         return result["output"]
     except Exception as e:
         logger.exception("Pipeline execution failed")
@@ -38,6 +129,90 @@ async def generate_data(request: GenerationRequest) -> GeneratedData:
             detail=str(e)
         )
 
+
+async def download_data(request: GenerationRequest, approval_token: Optional[str] = None) -> StreamingResponse:
+    """
+    File formats skip GeneratedData entirely: generation is written chunk by chunk to
+    a spooled temp file, which is then sent as the raw response body.
+    """
+    schema = None
+    try:
+        logger.info(f"📦 Generating {request.output_format} download for scenario: {request.scenario[:60]}")
+        with track_run() as run:
+            schema = await approved_schema(request, approval_token)
+            with timed_step("generate_data"):
+                spool = await stream_formatter.write_spool(
+                    stream_generator.astream(schema, request.run_id, request.seed),
+                    request.output_format,
+                    schema.fields,
+                    request.compression
+                )
+    except Exception as e:
+        logger.exception("Pipeline execution failed")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=failure_detail(e, request) if schema is not None else str(e)
+        )
+
+    media_type, extension = FILE_TYPES[request.output_format]
+    return StreamingResponse(
+        iter_file(spool),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="synthetic_data.{extension}"', **run.headers()}
+    )
+
+@router.post(
+    "/generate/stream",
+    response_class=StreamingResponse,
+    summary="Stream synthetic data as it is generated",
+    description="Run scenario → schema → approval, then stream records (NDJSON/SSE) or CSV rows chunk by chunk",
+    status_code=status.HTTP_200_OK
+)
+async def stream_data(
+    request: GenerationRequest,
+    transport: Literal["ndjson", "sse"] = Query("ndjson", description="Framing for json records; ignored for csv"),
+    approval_token: Optional[str] = Header(None, alias="X-Approval-Token", description="Skips schema review if trusted")
+) -> StreamingResponse:
+    if request.output_format not in ("json", "csv"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{request.output_format} output cannot be streamed; use csv or json"
+        )
+    try:
+        logger.info(f"📡 Streaming generation for scenario: {request.scenario[:60]}")
+        schema = await approved_schema(request, approval_token)
+    except Exception as e:
+        logger.exception("Streaming pipeline setup failed")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    async def body():
+        try:
+            async for piece in stream_formatter.stream(
+                stream_generator.astream(schema, request.run_id, request.seed),
+                request.output_format,
+                [f.name for f in schema.fields],
+                transport
+            ):
+                yield piece
+        except Exception as e:
+            logger.exception("Streaming generation failed")
+            # Headers are already sent, so the failure can only be reported in-band
+            error = {"error": failure_detail(e, request)}
+            if request.output_format == "json" and transport == "sse":
+                yield f"event: error\ndata: {json.dumps(error)}\n\n"
+            elif request.output_format == "json":
+                yield json.dumps(error) + "\n"
+            else:
+                # CSV has no error channel: abort the chunked transfer so the
+                # client sees a broken download rather than a short, valid-looking file
+                raise
+
+    media_type = "text/csv" if request.output_format == "csv" else STREAM_MEDIA_TYPES[transport]
+    return StreamingResponse(body(), media_type=media_type)
+
 @router.post(
     "/schema/preview",
     response_model=Schema,
@@ -48,9 +223,8 @@ async def generate_data(request: GenerationRequest) -> GeneratedData:
 async def preview_schema(request: GenerationRequest) -> Schema:
     try:
         logger.info(f"🧪 Previewing schema for scenario: {request.scenario[:60]}")
-        state = await graph.ainvoke({"request": request})  # ✅ also async
-        if state.get("error"):
-            raise ValueError(state["error"])
+        state = await preview_graph.ainvoke({"request": request})
+        raise_for_state(state, approval_required=False)
         return state["schema"]
     except Exception as e:
         logger.exception("Schema preview failed")
@@ -59,6 +233,111 @@ async def preview_schema(request: GenerationRequest) -> Schema:
             detail=str(e)
         )
 
+def job_status(job: dict) -> JobStatus:
+    return JobStatus(**{name: job[name] for name in JobStatus.model_fields})
+
+
+async def get_job_or_404(job_id: str) -> dict:
+    job = await asyncio.to_thread(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@router.post(
+    "/jobs",
+    response_model=JobStatus,
+    summary="Submit a background generation job",
+    description="Queue the full pipeline and return a job id immediately; poll /jobs/{job_id} for progress",
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_job(
+    request: GenerationRequest,
+    approval_token: Optional[str] = Header(None, alias="X-Approval-Token", description="Skips schema review if trusted")
+) -> JobStatus:
+    job_id = await job_runner.submit(request, approval_token)
+    return job_status(await get_job_or_404(job_id))
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatus,
+    summary="Get job status and progress"
+)
+async def get_job(job_id: str) -> JobStatus:
+    return job_status(await get_job_or_404(job_id))
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    summary="Download the output of a completed job",
+    description="json jobs return a GeneratedData body; file formats are returned as a file download",
+    responses={200: {"content": {"application/json": {}, **{media_type: {} for media_type, _ in FILE_TYPES.values()}}}}
+)
+async def get_job_result(job_id: str) -> FileResponse:
+    job = await get_job_or_404(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=job["error"])
+    if job["status"] != "completed":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job['status']}")
+
+    if job["output_format"] == "json":
+        return FileResponse(job["result_path"], media_type="application/json")
+    media_type, extension = FILE_TYPES[job["output_format"]]
+    return FileResponse(job["result_path"], media_type=media_type, filename=f"synthetic_data.{extension}")
+
+
+@router.get(
+    "/metrics/rate-limiter",
+    summary="Gemini rate limiter state and queue wait times per priority lane"
+)
+async def rate_limiter_metrics() -> dict:
+    return GeminiModel.limiter.stats()
+
+
+@router.get(
+    "/metrics",
+    response_class=Response,
+    summary="Prometheus metrics: node and Gemini call timings, tokens, retries, output and limiter state"
+)
+async def prometheus_metrics() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def require_reviewer(
+    token: Optional[str] = Header(None, alias="X-Approval-Token", description="Reviewer credential")
+) -> None:
+    # Without this, any caller could approve (or rewrite) their own schema
+    if not is_reviewer(token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="A reviewer token (X-Approval-Token) is required")
+
+
+@router.get(
+    "/approvals",
+    response_model=List[PendingApprovalInfo],
+    summary="Schemas waiting for review",
+    dependencies=[Depends(require_reviewer)]
+)
+async def list_approvals() -> List[PendingApprovalInfo]:
+    return [
+        PendingApprovalInfo(schema_id=item["schema_id"], schema_def=item["schema"], created_at=item["created_at"])
+        for item in approval_registry.pending()
+    ]
+
+
+@router.post(
+    "/approvals/{schema_id}",
+    summary="Approve or reject a pending schema",
+    description="Resumes the waiting generation; an edited schema_def replaces the proposed schema",
+    dependencies=[Depends(require_reviewer)]
+)
+async def submit_approval(schema_id: str, decision: ApprovalDecision) -> dict:
+    if not approval_registry.resolve(schema_id, decision.approved, decision.schema_def):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No pending approval: {schema_id}")
+    return {"schema_id": schema_id, "approved": decision.approved}
+
+
 @router.get("/health")
 async def health_check():
     return {"status": "healthy"}
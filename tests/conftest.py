@@ -0,0 +1,41 @@
+import os
+import sys
+
+# Tests import the app modules from the repo root and never reach Gemini
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("CHECKPOINT_DB_PATH", "")
+
+
+import json
+import re
+import pytest
+
+_COUNT = re.compile(r"exactly (\d+) records")
+
+
+class ScriptedModel:
+    """
+    Stands in for GeminiModel in DataGeneratorAgent(model=...). Each call is answered
+    by the next entry of replies (the last one repeats): a list of records, a raw
+    string, an exception to raise, or a function of the record count asked for.
+    """
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requested = []  # record count asked for by each call
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        count = int(_COUNT.search(prompt).group(1))
+        self.requested.append(count)
+        reply = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if callable(reply):
+            reply = reply(count)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply if isinstance(reply, str) else json.dumps(reply)
+
+
+@pytest.fixture
+def scripted():
+    return ScriptedModel
@@ -0,0 +1,62 @@
+import itertools
+import time
+import pytest
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from models.schemas import Schema
+from utils.checkpoint import CheckpointStore
+
+SCHEMA = Schema(
+    scenario="Members of a chain of climbing gyms",
+    sample_size=20,
+    fields=[{"name": "member_name", "type": "string", "description": "Full name of the gym member"}],
+)
+
+
+_ids = itertools.count()
+
+
+def names(count):
+    return [{"member_name": f"member {next(_ids)}"} for _ in range(count)]
+
+
+def agent_for(model, store):
+    agent = DataGeneratorAgent(model=model, max_concurrency=1, local_synthesis=False, checkpoints=store)
+    agent.chunk_size = 5
+    agent.adaptive_chunking = False
+    return agent
+
+
+def test_open_run_keeps_schema_and_seed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    assert store.open_run("run", SCHEMA, 7) == 7
+    assert store.open_run("run", SCHEMA, 8) == 7  # a resume gets the original seed
+    assert store.load_schema("run") == SCHEMA
+    with pytest.raises(ValueError, match="different schema"):
+        store.open_run("run", SCHEMA.model_copy(update={"sample_size": 21}), 7)
+
+
+def test_failed_run_resumes_from_completed_chunks(tmp_path, scripted):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    failing = scripted(names, names, RuntimeError("connection reset by peer"))
+    with pytest.raises(RuntimeError):
+        agent_for(failing, store).generate(SCHEMA, run_id="run")
+    saved = store.load_chunks("run")
+    assert sorted(saved) == [0, 5]
+
+    model = scripted(names)
+    records = agent_for(model, store).generate(SCHEMA, run_id="run")
+
+    assert model.requested == [5, 5]  # only offsets 10 and 15
+    assert records[:10] == saved[0] + saved[5]
+    assert len(records) == 20
+    assert store.load_schema("run") is None and store.load_chunks("run") == {}  # cleared once complete
+
+
+def test_expired_runs_are_purged_when_a_run_opens(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"), ttl_seconds=0.05)
+    store.open_run("old", SCHEMA, 1)
+    store.save_chunk("old", 0, [{"member_name": "a"}])
+    time.sleep(0.1)
+    store.open_run("new", SCHEMA, 2)
+    assert store.load_schema("old") is None and store.load_chunks("old") == {}
+    assert store.load_schema("new") == SCHEMA
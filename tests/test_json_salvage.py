@@ -0,0 +1,27 @@
+from utils.json_salvage import salvage_json_array
+
+
+def test_complete_array():
+    assert salvage_json_array('[{"a": 1}, {"a": 2}]') == ([{"a": 1}, {"a": 2}], True)
+
+
+def test_fenced_reply():
+    assert salvage_json_array('```json\n[{"a": 1}]\n```') == ([{"a": 1}], True)
+
+
+def test_text_before_the_array():
+    reply = 'Sure! Note [1]: data below\n[{"a": 1}]'
+    assert salvage_json_array(reply) == ([{"a": 1}], True)
+
+
+def test_truncated_reply_keeps_complete_objects():
+    assert salvage_json_array('[{"a": 1}, {"a": 2}, {"a": ') == ([{"a": 1}, {"a": 2}], False)
+
+
+def test_missing_opening_bracket():
+    assert salvage_json_array('{"a": 1}, {"a": 2}') == ([{"a": 1}, {"a": 2}], False)
+
+
+def test_empty_array_and_no_json():
+    assert salvage_json_array("[]") == ([], True)
+    assert salvage_json_array("I cannot help with that [sorry]") == ([], False)
@@ -0,0 +1,32 @@
+import asyncio
+import uuid
+from benchmarks.fake_llm import FakeGeminiModel, FakeGenerativeModel
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from agents.HumanInteractionAgent import HumanInteractionAgent
+from agents.OutputFormatterAgent import OutputFormatterAgent
+from models.schemas import GenerationRequest, Schema
+from pipeline import create_pipeline
+from utils.gemini_model import GeminiModel
+
+
+def unreachable(*args, **kwargs):
+    raise AssertionError("schema preview must not reach approval or generation")
+
+
+def test_preview_stops_after_inference(monkeypatch):
+    fake = FakeGeminiModel()
+    monkeypatch.setattr(GeminiModel, "get_model", staticmethod(lambda *args, **kwargs: FakeGenerativeModel(fake)))
+    for cls, name in ((HumanInteractionAgent, "get_approval"), (DataGeneratorAgent, "astream"),
+                      (DataGeneratorAgent, "agenerate"), (OutputFormatterAgent, "format"),
+                      (OutputFormatterAgent, "write_stream")):
+        monkeypatch.setattr(cls, name, unreachable)
+    preview_graph = create_pipeline(stop_after="infer_fields")
+    # A fresh scenario, so neither step is answered from the scenario/schema cache
+    request = GenerationRequest(scenario=f"Customers of an online shop, preview test {uuid.uuid4().hex}")
+
+    state = asyncio.run(preview_graph.ainvoke({"request": request}))
+
+    assert not state.get("error")
+    assert isinstance(state["schema"], Schema)
+    assert state.get("validated_schema") is None and state.get("output") is None
+    assert fake.calls == 2  # scenario cleaning and schema inference
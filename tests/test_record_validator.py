@@ -0,0 +1,51 @@
+import pytest
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from models.schemas import Schema
+from utils.record_validator import InvalidValue, RecordValidator
+
+SCHEMA = Schema(
+    scenario="Orders placed in an online shop",
+    sample_size=5,
+    fields=[
+        {"name": "amount", "type": "number", "description": "Order total in euros, with cents"},
+        {"name": "paid", "type": "boolean", "description": "Whether the order has been paid for"},
+        {"name": "ordered_on", "type": "date", "description": "Calendar date the order was placed"},
+    ],
+)
+
+
+def test_coerces_values_and_keeps_schema_fields_in_order():
+    record = {"paid": "yes", "extra": 1, "ordered_on": "2024-03-01T10:15:00", "amount": "1,234.50"}
+    assert list(RecordValidator(SCHEMA).validate(record).items()) == [
+        ("amount", 1234.5), ("paid", True), ("ordered_on", "2024-03-01")
+    ]
+
+
+@pytest.mark.parametrize("field, value", [
+    ("amount", "1,5"),  # decimal comma, not 15
+    ("amount", True),
+    ("amount", "NaN"),
+    ("paid", "maybe"),
+    ("ordered_on", "03/01/2024"),
+    ("ordered_on", None),
+])
+def test_rejects_invalid_values(field, value):
+    record = {"amount": 10, "paid": False, "ordered_on": "2024-03-01", field: value}
+    with pytest.raises(InvalidValue, match=field):
+        RecordValidator(SCHEMA).validate(record)
+
+
+def test_only_invalid_records_are_requested_again(scripted):
+    def valid(amount):
+        return {"amount": amount, "paid": True, "ordered_on": "2024-03-01"}
+
+    invalid = {"amount": "ten", "paid": True, "ordered_on": "2024-03-01"}
+    model = scripted([valid(1), invalid, valid(2), invalid, valid(3)], lambda count: [valid(4), valid(5)][:count])
+    agent = DataGeneratorAgent(model=model, local_synthesis=False, checkpoints=None)
+    agent.chunk_size = 5
+    agent.adaptive_chunking = False
+
+    records = agent.generate(SCHEMA)
+
+    assert model.requested == [5, 2]
+    assert records == [valid(amount) for amount in range(1, 6)]
@@ -0,0 +1,101 @@
+import pytest
+from agents.DataGeneratorAgent import DataGeneratorAgent
+from models.schemas import FieldDefinition, Schema
+from utils.uniqueness import BloomKeys, HashSetKeys, UniquenessIndex
+from utils.value_synthesizer import LocalValueSynthesizer
+
+FIELDS = [
+    FieldDefinition(name="email", type="string", description="Login email of the customer, unique per customer"),
+    FieldDefinition(name="city", type="string", description="City of the customer's billing address"),
+]
+
+
+@pytest.fixture(params=["hash_set", "bloom"])
+def make_index(request):
+    """Builds indexes in hash-set or Bloom filter mode"""
+    def make(fields=FIELDS):
+        index = UniquenessIndex(fields, 1000, bloom_above=0 if request.param == "bloom" else 10 ** 6)
+        assert isinstance(index.rows, BloomKeys if request.param == "bloom" else HashSetKeys)
+        return index
+    return make
+
+
+@pytest.fixture
+def index(make_index):
+    return make_index()
+
+
+def test_rejects_repeated_unique_values(index):
+    assert index.admit({"email": "ann@example.com", "city": "Oslo"}) is None
+    # Keys are compared normalized
+    assert index.admit({"email": " Ann@Example.com", "city": "Rome"}) == "duplicate value for unique field 'email'"
+    assert index.admit({"email": "bob@example.com", "city": "Oslo"}) is None
+    assert (index.admitted, index.rejected) == (2, 1)
+
+
+def test_rejects_repeated_rows(make_index):
+    index = make_index([FIELDS[1]])
+    assert index.admit({"city": "Oslo"}) is None
+    assert index.admit({"city": "oslo"}) == "duplicate row"
+
+
+def test_rejected_record_claims_no_keys(index):
+    index.admit({"email": "ann@example.com", "city": "Oslo"})
+    index.admit({"email": "ann@example.com", "city": "Rome"})
+    assert index.admit({"email": "carl@example.com", "city": "Rome"}) is None
+
+
+def test_registered_records_count_as_seen(index):
+    index.register([{"email": "ann@example.com", "city": "Oslo"}])
+    admitted, conflicts = index.filter([
+        {"email": "ann@example.com", "city": "Rome"},
+        {"email": "bob@example.com", "city": "Rome"},
+    ])
+    assert admitted == [{"email": "bob@example.com", "city": "Rome"}]
+    assert conflicts == ["duplicate value for unique field 'email'"]
+
+
+def test_row_checks_give_up_on_low_cardinality_schemas():
+    index = UniquenessIndex([FIELDS[1]], 1000)
+    index.row_tolerance_min = 2
+    results = [index.admit({"city": "Oslo"}) for _ in range(5)]
+    assert results == [None, "duplicate row", "duplicate row", None, None]
+    assert index.rows is None
+
+
+def test_bloom_keys_have_no_false_negatives():
+    keys = BloomKeys(10_000, 0.001)
+    for i in range(10_000):
+        keys.add(str(i))
+    assert all(str(i) in keys for i in range(10_000))
+
+
+def test_duplicates_across_chunks_are_regenerated(scripted):
+    schema = Schema(scenario="Customers of an online shop", sample_size=6, fields=FIELDS)
+
+    def customers(*ids):
+        return [{"email": f"c{i}@example.com", "city": "Oslo"} for i in ids]
+
+    # The second chunk repeats two emails from the first
+    model = scripted(customers(1, 2, 3), customers(2, 3, 4), customers(5, 6))
+    agent = DataGeneratorAgent(model=model, max_concurrency=1, local_synthesis=False, checkpoints=None)
+    agent.chunk_size = 3
+    agent.adaptive_chunking = False
+
+    records = agent.generate(schema)
+
+    assert model.requested == [3, 3, 2]
+    assert [r["email"] for r in records] == [f"c{i}@example.com" for i in (1, 2, 3, 4, 5, 6)]
+
+
+def test_local_unique_ranges_stay_distinct_across_chunks():
+    schema = Schema(scenario="Customers of an online shop", sample_size=1000, fields=[
+        {"name": "customer_no", "type": "number", "description": "Unique customer number on the account",
+         "constraints": "Between 1000 and 9999"},
+    ])
+    synth = LocalValueSynthesizer(schema, seed=3)
+    values = [v for start in range(0, 1000, 37) for v in synth.generate(start, min(37, 1000 - start))["customer_no"]]
+    assert len(set(values)) == 1000 and all(1000 <= v <= 9999 for v in values)
+
+    with pytest.raises(ValueError, match="distinct values"):
+        LocalValueSynthesizer(schema.model_copy(update={"sample_size": 9001}))
@@ -0,0 +1,97 @@
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from models.schemas import FieldDefinition, FieldType
+
+logger = logging.getLogger(__name__)
+
+
+def _with_row(value, row: int):
+    text = str(value)
+    if "@" in text:
+        local, domain = text.split("@", 1)
+        return f"{local}.{row}@{domain}"
+    return f"{text}-{row}"
+
+
+class SeedAmplifier:
+    """
+    Grows a small LLM-generated seed set into any number of rows locally.
+
+    Each output row is based on a seed row drawn with replacement, so categorical
+    columns follow the seed frequencies and keep their co-occurrences. Numeric and
+    date columns are then perturbed with Gaussian noise whose bandwidth is fitted
+    to the seed distribution (Silverman's rule) and clipped to the observed range.
+
+    Resampling would repeat values of unique columns, so those are made unique by
+    row instead: numbers count up from the seed minimum, strings get the row number
+    appended (before the "@" of email-like values).
+    """
+
+    def __init__(self, fields: List[FieldDefinition], seed_records: List[dict], seed: Optional[int] = None,
+                 unique: Optional[List[str]] = None):
+        if not seed_records:
+            raise ValueError("Amplification needs at least one seed record")
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 63))
+        self.size = len(seed_records)
+        unique = set(unique or ())
+        self.columns: Dict[str, dict] = {}
+        for field in fields:
+            raw = [record.get(field.name) for record in seed_records]
+            column = self._fit(field.type, raw)
+            column["unique"] = field.name in unique and (
+                column["kind"] == "number" or (column["kind"] == "categorical" and field.type == FieldType.STRING)
+            )
+            self.columns[field.name] = column
+
+    def _fit(self, field_type: FieldType, raw: list) -> dict:
+        if field_type == FieldType.NUMBER:
+            values = pd.to_numeric(pd.Series(raw, dtype=object), errors="coerce")
+            if values.notna().all():
+                array = values.to_numpy(dtype=np.float64)
+                integer = all(isinstance(v, int) and not isinstance(v, bool) for v in raw)
+                places = min(6, max(len(str(v).split(".")[1]) if "." in str(v) else 0 for v in raw))
+                return {"kind": "number", "values": array, "integer": integer, "places": places,
+                        "bandwidth": self._bandwidth(array), "low": array.min(), "high": array.max()}
+
+        elif field_type in (FieldType.DATE, FieldType.DATETIME):
+            unit = "D" if field_type == FieldType.DATE else "s"
+            parsed = pd.to_datetime(pd.Series(raw, dtype=object), errors="coerce", utc=True, format="ISO8601")
+            if parsed.notna().all():
+                ticks = parsed.dt.tz_localize(None).to_numpy().astype(f"datetime64[{unit}]").astype(np.int64)
+                return {"kind": "temporal", "unit": unit, "values": ticks,
+                        "bandwidth": self._bandwidth(ticks.astype(np.float64)),
+                        "low": ticks.min(), "high": ticks.max()}
+
+        # Strings, booleans and anything that didn't parse cleanly: resample observed values
+        return {"kind": "categorical", "values": np.array(raw, dtype=object)}
+
+    def _bandwidth(self, values: np.ndarray) -> float:
+        return 1.06 * float(values.std()) * len(values) ** -0.2 if len(values) > 1 else 0.0
+
+    def generate(self, start: int, count: int) -> Dict[str, list]:
+        """Column-wise values for rows [start, start + count)"""
+        rng = np.random.default_rng([self.seed, start, 1])
+        rows = rng.integers(0, self.size, size=count)
+        out = {}
+        for name, column in self.columns.items():
+            base = column["values"][rows]
+            if column["unique"] and column["kind"] == "number":
+                out[name] = (int(column["low"]) + np.arange(start, start + count)).tolist()
+                continue
+            if column["unique"]:
+                out[name] = [_with_row(value, row) for value, row in zip(base.tolist(), range(start, start + count))]
+                continue
+            if column["kind"] == "categorical":
+                out[name] = base.tolist()
+                continue
+
+            values = np.clip(base + rng.normal(0.0, column["bandwidth"], size=count), column["low"], column["high"])
+            if column["kind"] == "number":
+                out[name] = np.rint(values).astype(np.int64).tolist() if column["integer"] else values.round(column["places"]).tolist()
+            else:
+                unit = column["unit"]
+                stamps = np.rint(values).astype(np.int64).astype(f"datetime64[{unit}]")
+                out[name] = np.datetime_as_string(stamps, unit=unit).tolist()
+        return out
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from cachetools import TTLCache
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so scenarios differing only in spacing share a cache entry"""
+    return " ".join(text.split())
+
+
+def make_key(*parts: Any) -> str:
+    """Content-addressed key: sha256 over the JSON encoding of every input that shapes the answer"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """In-process LRU tier with per-entry TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+
+
+class SQLiteCache:
+    """On-disk tier shared across restarts and worker processes"""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now)
+            )
+            # Evict expired rows, then least recently used ones beyond capacity
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+
+class LLMCache:
+    """
+    Two-tier cache for deterministic LLM steps (scenario cleaning, schema inference).
+
+    Values must be JSON-serializable; they are stored encoded so callers always get
+    a fresh copy they are free to mutate.
+    """
+
+    def __init__(self, memory: Optional[MemoryCache] = None, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Any]:
+        encoded = self.memory.get(key) if self.memory else None
+        if encoded is None and self.disk:
+            encoded = self.disk.get(key)
+            if encoded is not None and self.memory:
+                self.memory.set(key, encoded)  # promote to the fast tier
+        return json.loads(encoded) if encoded is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        encoded = json.dumps(value)
+        if self.memory:
+            self.memory.set(key, encoded)
+        if self.disk:
+            try:
+                self.disk.set(key, encoded)
+            except sqlite3.Error as e:
+                logger.warning(f"[LLMCache] Disk tier write failed: {e}")
+
+
+def build_cache() -> LLMCache:
+    memory = MemoryCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS) if config.CACHE_MAX_ENTRIES > 0 else None
+    disk = SQLiteCache(config.CACHE_DB_PATH, config.CACHE_DB_MAX_ENTRIES, config.CACHE_TTL_SECONDS) \
+        if config.CACHE_DB_PATH else None
+    return LLMCache(memory=memory, disk=disk)
+
+
+# Process-wide default shared by the agents
+llm_cache = build_cache()
@@ -0,0 +1,108 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from config import config
+from models.schemas import Schema
+from utils.cache import make_key
+
+logger = logging.getLogger(__name__)
+
+SEED_SET_OFFSET = -1  # amplified runs checkpoint their LLM seed set under this offset
+
+
+class CheckpointStore:
+    """
+    Completed generation chunks, keyed by run id and offset, so a failed run can be
+    resumed without paying for those chunks again.
+
+    Each run also records its schema (resuming against a different schema is refused)
+    and the seed for local synthesis, so regenerated local columns come out identical.
+
+    Finished runs clear themselves; runs that failed and were never resumed are
+    purged ttl_seconds after they started, whenever a new run is opened.
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_runs ("
+            "run_id TEXT PRIMARY KEY, schema_key TEXT NOT NULL, schema TEXT NOT NULL, "
+            "seed INTEGER NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_chunks ("
+            "run_id TEXT NOT NULL, start INTEGER NOT NULL, records TEXT NOT NULL, "
+            "PRIMARY KEY (run_id, start))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS checkpoint_runs_created ON checkpoint_runs (created_at)")
+        self._conn.commit()
+
+    def open_run(self, run_id: str, schema: Schema, seed: int) -> int:
+        """Registers a new run, or validates a resumed one; returns the run's seed"""
+        schema_key = make_key(schema.model_dump(mode="json"))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT schema_key, seed FROM checkpoint_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                if self.ttl_seconds is not None:
+                    self._purge(time.time() - self.ttl_seconds)
+                self._conn.execute(
+                    "INSERT INTO checkpoint_runs (run_id, schema_key, schema, seed, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, schema_key, schema.model_dump_json(), seed, time.time())
+                )
+                self._conn.commit()
+                return seed
+        if row[0] != schema_key:
+            raise ValueError(f"Run {run_id} was checkpointed with a different schema; use a new run_id")
+        return row[1]
+
+    def _purge(self, cutoff: float) -> None:
+        """Drops runs started before cutoff; the caller holds the lock and commits"""
+        expired = "SELECT run_id FROM checkpoint_runs WHERE created_at < ?"
+        self._conn.execute(f"DELETE FROM checkpoint_chunks WHERE run_id IN ({expired})", (cutoff,))
+        deleted = self._conn.execute("DELETE FROM checkpoint_runs WHERE created_at < ?", (cutoff,)).rowcount
+        if deleted:
+            logger.info(f"[CheckpointStore] Purged {deleted} expired run(s)")
+
+    def load_schema(self, run_id: str) -> Optional[Schema]:
+        with self._lock:
+            row = self._conn.execute("SELECT schema FROM checkpoint_runs WHERE run_id = ?", (run_id,)).fetchone()
+        return Schema.model_validate_json(row[0]) if row else None
+
+    def save_chunk(self, run_id: str, start: int, records: list) -> None:
+        encoded = json.dumps(records)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_chunks (run_id, start, records) VALUES (?, ?, ?)",
+                (run_id, start, encoded)
+            )
+            self._conn.commit()
+
+    def load_chunks(self, run_id: str) -> Dict[int, list]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start, records FROM checkpoint_chunks WHERE run_id = ? ORDER BY start", (run_id,)
+            ).fetchall()
+        return {start: json.loads(records) for start, records in rows}
+
+    def clear(self, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoint_chunks WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM checkpoint_runs WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+
+def build_checkpoint_store() -> Optional[CheckpointStore]:
+    if not config.CHECKPOINT_DB_PATH:
+        return None
+    return CheckpointStore(config.CHECKPOINT_DB_PATH, config.CHECKPOINT_TTL_SECONDS)
+
+
+# Process-wide default used by DataGeneratorAgent
+checkpoint_store = build_checkpoint_store()
@@ -0,0 +1,109 @@
+import logging
+from collections import Counter, deque
+from models.schemas import FieldType, Schema
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # rough average for JSON-ish English output
+
+# Prior guess of tokens a single value of each type costs in the response
+_VALUE_TOKENS = {
+    FieldType.STRING: 8,
+    FieldType.NUMBER: 3,
+    FieldType.BOOLEAN: 2,
+    FieldType.DATE: 6,
+    FieldType.DATETIME: 10,
+}
+
+
+def estimate_record_tokens(schema: Schema) -> float:
+    """Schema-only estimate of output tokens per record, used before any response is seen"""
+    tokens = 2.0  # braces and separator
+    for field in schema.fields:
+        # quoted key, colon, indentation and comma
+        tokens += len(field.name) / CHARS_PER_TOKEN + 3 + _VALUE_TOKENS.get(field.type, 8)
+    return tokens
+
+
+class AdaptiveChunkSizer:
+    """
+    AIMD controller for records per Gemini call.
+
+    The ceiling is whatever fits in max_output_tokens (with headroom) at the current
+    tokens-per-record estimate, which starts from the schema and follows observed
+    responses. Successful calls grow the size additively while the truncation rate
+    over the recent window is under target; a truncated response halves it (or cuts it
+    to what actually fit, if that is smaller).
+    """
+
+    def __init__(self, schema: Schema, max_output_tokens: int, initial_size: int = 20,
+                 min_size: int = 1, increase: int = 4, decrease: float = 0.5,
+                 headroom: float = 0.8, target_truncation_rate: float = 0.05, smoothing: float = 0.3,
+                 rate_window: int = 20):
+        self.max_output_tokens = max_output_tokens
+        self.min_size = min_size
+        self.increase = increase
+        self.decrease = decrease
+        self.headroom = headroom
+        self.target_truncation_rate = target_truncation_rate
+        self.smoothing = smoothing
+
+        self.tokens_per_record = estimate_record_tokens(schema)
+        self.size = max(min_size, min(initial_size, self.ceiling()))
+
+        self.calls = 0
+        self.truncations = 0
+        self.recent = deque(maxlen=rate_window)  # truncated? flags of the latest calls
+        self.chosen = Counter()
+
+    def ceiling(self) -> int:
+        return max(self.min_size, int(self.max_output_tokens * self.headroom / self.tokens_per_record))
+
+    def truncation_rate(self) -> float:
+        return self.truncations / self.calls if self.calls else 0.0
+
+    def recent_truncation_rate(self) -> float:
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    def next_size(self) -> int:
+        size = max(self.min_size, min(self.size, self.ceiling()))
+        self.chosen[size] += 1
+        return size
+
+    def _observe(self, records: int, response_chars: int) -> None:
+        if records:
+            observed = response_chars / CHARS_PER_TOKEN / records
+            self.tokens_per_record += self.smoothing * (observed - self.tokens_per_record)
+
+    def record_success(self, records: int, response_chars: int) -> None:
+        self.calls += 1
+        self.recent.append(False)
+        self._observe(records, response_chars)
+        if self.recent_truncation_rate() <= self.target_truncation_rate:
+            self.size = min(self.size + self.increase, self.ceiling())
+
+    def record_truncation(self, requested: int, records: int = 0, response_chars: int = 0) -> None:
+        self.calls += 1
+        self.truncations += 1
+        self.recent.append(True)
+        # A cut-off reply still tells us how many records fit in the output budget
+        self._observe(records, response_chars)
+        # Chunks sized before the last decrease report late; only back off once per window
+        if requested <= self.size:
+            size = int(self.size * self.decrease)
+            if records:
+                size = min(size, int(records * self.headroom))
+            self.size = max(self.min_size, size)
+
+    def stats(self) -> dict:
+        sizes = sorted(self.chosen.elements())
+        return {
+            "calls": self.calls,
+            "truncations": self.truncations,
+            "truncation_rate": round(self.truncation_rate(), 4),
+            "tokens_per_record": round(self.tokens_per_record, 1),
+            "chunk_size_min": sizes[0] if sizes else None,
+            "chunk_size_max": sizes[-1] if sizes else None,
+            "chunk_size_mean": round(sum(sizes) / len(sizes), 1) if sizes else None,
+            "chunk_sizes": dict(sorted(self.chosen.items())),
+        }
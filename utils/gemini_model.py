@@ -1,30 +1,157 @@
+import asyncio
+import threading
+import time
 import google.generativeai as genai
+from prometheus_client import REGISTRY
 from config import config
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from google.generativeai.types import GenerationConfig
+from utils.chunk_sizing import CHARS_PER_TOKEN
+from utils.metrics import RateLimiterCollector, record_llm_call
+from utils.rate_limiter import gemini_limiter
+from utils.replay import llm_replay
+from utils.retry import BlockedResponseError
+
+
+def reserved_tokens(prompt: str, max_output_tokens: int) -> int:
+    """Worst-case billable tokens of a call: estimated prompt tokens plus the whole output budget"""
+    return int(len(prompt) / CHARS_PER_TOKEN) + max_output_tokens
+
+
+def billed_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) or None
+
+
+def usage_tokens(prompt: str, response, text: str) -> Tuple[int, int]:
+    """(prompt, response) tokens from usage metadata, estimated from characters when it is missing"""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    response_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is None:
+        prompt_tokens = int(len(prompt) / CHARS_PER_TOKEN)
+    if response_tokens is None:
+        response_tokens = int(len(text) / CHARS_PER_TOKEN)
+    return prompt_tokens, response_tokens
+
+
+def response_text(response) -> str:
+    try:
+        return response.text
+    except ValueError as e:
+        # The SDK's quick accessor raises ValueError when a block left no text parts
+        raise BlockedResponseError(str(e)) from e
+
 
 class GeminiModel:
+    # Process-wide registry: one GenerativeModel per (model name, generation config).
+    # The SDK keeps one transport per client type, so reusing models also reuses connections.
+    _models: Dict[Tuple, genai.GenerativeModel] = {}
+    _models_lock = threading.Lock()
+    limiter = gemini_limiter  # shared RPM/TPM/concurrency limits; every call waits on it
+    replay = llm_replay  # record/replay of responses (LLM_REPLAY_MODE); None calls Gemini directly
+
     @staticmethod
     def configure():
         genai.configure(api_key=config.GEMINI_API_KEY)
+        # configure() replaces the SDK transports; drop models bound to the old ones
+        with GeminiModel._models_lock:
+            GeminiModel._models.clear()
 
     @staticmethod
-    def get_model(model_name=config.DEFAULT_MODEL) -> genai.GenerativeModel:
-        return genai.GenerativeModel(model_name)
+    def get_model(model_name=config.DEFAULT_MODEL,
+                  generation_config: Optional[Dict[str, Any]] = None) -> genai.GenerativeModel:
+        key = (model_name, tuple(sorted((generation_config or {}).items())))
+        model = GeminiModel._models.get(key)
+        if model is None:
+            with GeminiModel._models_lock:
+                model = GeminiModel._models.get(key)
+                if model is None:
+                    model = genai.GenerativeModel(
+                        model_name,
+                        generation_config=GenerationConfig(**generation_config) if generation_config else None
+                    )
+                    GeminiModel._models[key] = model
+        return model
 
-    def generate(prompt: str, 
+    @staticmethod
+    def generate(prompt: str,
         temperature: float = 0.2,
         top_p: float = 0.9,
-        max_output_tokens: int = 3500) -> str:
-        model = GeminiModel.get_model()
-        generation_config = GenerationConfig(
-            temperature=temperature,
-            top_p=top_p,
-            max_output_tokens=max_output_tokens
-        )
-
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config
-        )
-        return response.text
\ No newline at end of file
+        max_output_tokens: int = 3500,
+        priority: str = "interactive",
+        replay_tag: Optional[str] = None) -> str:
+        """replay_tag distinguishes deliberately repeated prompts when recording/replaying"""
+        generation_config = {
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_output_tokens": max_output_tokens
+        }
+        replay = GeminiModel.replay
+        if replay is not None:
+            key = replay.key(config.DEFAULT_MODEL, prompt, generation_config, replay_tag)
+            recorded = replay.lookup(key)
+            if recorded is not None:
+                record_llm_call(priority, "replayed", 0.0)
+                return recorded  # no network, no quota
+
+        model = GeminiModel.get_model(generation_config=generation_config)
+        with GeminiModel.limiter.limit(reserved_tokens(prompt, max_output_tokens), priority) as permit:
+            called = time.perf_counter()
+            try:
+                response = model.generate_content(prompt)
+                permit.used_tokens = billed_tokens(response)
+                text = response_text(response)
+            except Exception:
+                record_llm_call(priority, "error", time.perf_counter() - called, permit.waited)
+                raise
+            record_llm_call(priority, "ok", time.perf_counter() - called, permit.waited,
+                            *usage_tokens(prompt, response, text))
+        if replay is not None:
+            replay.record(key, config.DEFAULT_MODEL, prompt, generation_config, replay_tag, text)
+        return text
+
+    @staticmethod
+    async def agenerate(prompt: str,
+        temperature: float = 0.2,
+        top_p: float = 0.9,
+        max_output_tokens: int = 3500,
+        priority: str = "interactive",
+        replay_tag: Optional[str] = None) -> str:
+        """Non-blocking counterpart of generate() for use inside the event loop"""
+        generation_config = {
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_output_tokens": max_output_tokens
+        }
+        replay = GeminiModel.replay
+        if replay is not None:
+            key = replay.key(config.DEFAULT_MODEL, prompt, generation_config, replay_tag)
+            recorded = await asyncio.to_thread(replay.lookup, key)
+            if recorded is not None:
+                record_llm_call(priority, "replayed", 0.0)
+                return recorded
+
+        model = GeminiModel.get_model(generation_config=generation_config)
+        async with GeminiModel.limiter.alimit(reserved_tokens(prompt, max_output_tokens), priority) as permit:
+            called = time.perf_counter()
+            try:
+                if hasattr(model, "generate_content_async"):
+                    response = await model.generate_content_async(prompt)
+                else:
+                    # Older SDKs have no async surface: keep the loop free via a worker thread
+                    response = await asyncio.to_thread(model.generate_content, prompt)
+                permit.used_tokens = billed_tokens(response)
+                text = response_text(response)
+            except Exception:
+                record_llm_call(priority, "error", time.perf_counter() - called, permit.waited)
+                raise
+            record_llm_call(priority, "ok", time.perf_counter() - called, permit.waited,
+                            *usage_tokens(prompt, response, text))
+        if replay is not None:
+            await asyncio.to_thread(replay.record, key, config.DEFAULT_MODEL, prompt, generation_config, replay_tag, text)
+        return text
+
+
+# Limiter state is read at scrape time, so a limiter swapped in later is still what gets exported
+REGISTRY.register(RateLimiterCollector(lambda: GeminiModel.limiter.stats()))
@@ -0,0 +1,70 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+_COLUMNS = ("job_id", "status", "request", "output_format", "rows_done", "rows_total",
+            "chunks_done", "chunks_total", "error", "result_path", "created_at", "updated_at")
+
+
+class JobStore:
+    """SQLite record of generation jobs: request, status, progress and result file location"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, output_format TEXT NOT NULL, "
+            "rows_done INTEGER NOT NULL DEFAULT 0, rows_total INTEGER, "
+            "chunks_done INTEGER NOT NULL DEFAULT 0, chunks_total INTEGER, "
+            "error TEXT, result_path TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def create(self, request: dict, output_format: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, request, output_format, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(request), output_format, now, now)
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["request"] = json.loads(job["request"])
+        return job
+
+    def update(self, job_id: str, **values) -> None:
+        unknown = set(values) - set(_COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown job columns: {sorted(unknown)}")
+        values["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*values.values(), job_id))
+            self._conn.commit()
+
+    def requeue_unfinished(self) -> List[str]:
+        """Puts jobs left running by a previous process back in the queue; returns every queued id, oldest first"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'", (time.time(),)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
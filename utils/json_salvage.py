@@ -0,0 +1,48 @@
+import re
+from json import JSONDecodeError, JSONDecoder
+from typing import List, Tuple
+
+_decoder = JSONDecoder()
+_SEPARATORS = " \t\r\n,"
+# The array of records, not a "[1]" or "[note]" in text the model put before it
+_ARRAY_START = re.compile(r"\[\s*[{\]]")
+
+
+def strip_fences(text: str) -> str:
+    return text.strip().replace("```json", "").replace("```", "").strip()
+
+
+def salvage_json_array(text: str) -> Tuple[List[dict], bool]:
+    """
+    Incrementally parses a JSON array of objects, keeping every complete object.
+
+    Decoding stops at the first element that doesn't parse (typically a reply cut
+    off by max_output_tokens). Returns the objects recovered so far and whether the
+    array was properly closed. A missing opening bracket, and prose before the
+    array, are tolerated.
+    """
+    cleaned = strip_fences(text)
+    array = _ARRAY_START.search(cleaned)
+    first_object = cleaned.find("{")
+    if array is None or (0 <= first_object < array.start()):
+        if first_object < 0:
+            return [], False
+        pos = first_object
+    else:
+        pos = array.start() + 1
+
+    records = []
+    length = len(cleaned)
+    while True:
+        while pos < length and cleaned[pos] in _SEPARATORS:
+            pos += 1
+        if pos >= length:
+            return records, False
+        if cleaned[pos] == "]":
+            return records, True
+        try:
+            item, pos = _decoder.raw_decode(cleaned, pos)
+        except JSONDecodeError:
+            return records, False
+        if isinstance(item, dict):
+            records.append(item)
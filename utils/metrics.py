@@ -0,0 +1,200 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Iterator, Optional
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+_LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+NODE_SECONDS = Histogram("synthgen_node_seconds", "Wall time of pipeline graph nodes", ["node"],
+                         buckets=_LLM_BUCKETS)
+NODE_ERRORS = Counter("synthgen_node_errors_total", "Pipeline nodes that ended with an error", ["node"])
+LLM_SECONDS = Histogram("synthgen_llm_call_seconds", "Gemini call time after admission by the rate limiter",
+                        ["priority", "outcome"], buckets=_LLM_BUCKETS)
+LLM_QUEUE_SECONDS = Histogram("synthgen_llm_queue_wait_seconds", "Time Gemini calls waited on the rate limiter",
+                              ["priority"], buckets=(0,) + _LLM_BUCKETS)
+LLM_TOKENS = Counter("synthgen_llm_tokens_total",
+                     "Gemini tokens, from usage metadata or estimated from characters when absent", ["kind"])
+LLM_RETRIES = Counter("synthgen_llm_retries_total", "LLM requests made again, by reason", ["reason"])
+OUTPUT_ROWS = Counter("synthgen_output_rows_total", "Rows written by the output formatter", ["format"])
+OUTPUT_BYTES = Counter("synthgen_output_bytes_total", "Bytes written by the output formatter", ["format"])
+
+
+class RunMetrics:
+    """Totals for one pipeline run; filled by whatever runs inside track_run()"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.nodes: Dict[str, float] = {}
+        self.llm_calls = 0
+        self.llm_replayed = 0
+        self.llm_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.retries = 0
+        self.rows = 0
+        self.output_bytes = 0
+        self._lock = threading.Lock()  # Gemini calls also report from worker threads
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self.started, 3),
+                "node_seconds": {name: round(seconds, 3) for name, seconds in self.nodes.items()},
+                "llm_calls": self.llm_calls,
+                "llm_replayed": self.llm_replayed,
+                "llm_seconds": round(self.llm_seconds, 3),
+                "queue_wait_seconds": round(self.queue_wait_seconds, 3),
+                "prompt_tokens": self.prompt_tokens,
+                "response_tokens": self.response_tokens,
+                "retries": self.retries,
+                "rows": self.rows,
+                "output_bytes": self.output_bytes,
+            }
+
+    def message(self) -> str:
+        s = self.summary()
+        nodes = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in s["node_seconds"].items())
+        return (f"{s['rows']} rows in {s['total_seconds']:.2f}s ({nodes}); {s['llm_calls']} LLM calls, "
+                f"{s['prompt_tokens']} prompt / {s['response_tokens']} response tokens, "
+                f"{s['queue_wait_seconds']:.2f}s queued, {s['retries']} retries")
+
+    def headers(self) -> Dict[str, str]:
+        s = self.summary()
+        # Server-Timing durations are in milliseconds
+        timing = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in s["node_seconds"].items()]
+        timing.append(f"llm-queue;dur={s['queue_wait_seconds'] * 1000:.1f}")
+        timing.append(f"total;dur={s['total_seconds'] * 1000:.1f}")
+        return {
+            "Server-Timing": ", ".join(timing),
+            "X-LLM-Calls": str(s["llm_calls"]),
+            "X-LLM-Prompt-Tokens": str(s["prompt_tokens"]),
+            "X-LLM-Response-Tokens": str(s["response_tokens"]),
+            "X-LLM-Retries": str(s["retries"]),
+            "X-Output-Rows": str(s["rows"]),
+        }
+
+
+_current_run: ContextVar[Optional[RunMetrics]] = ContextVar("run_metrics", default=None)
+
+
+@contextmanager
+def track_run() -> Iterator[RunMetrics]:
+    """Collects everything reported by the current task (and tasks/threads it starts) into one RunMetrics"""
+    run = RunMetrics()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+def current_run() -> Optional[RunMetrics]:
+    return _current_run.get()
+
+
+def _observe_step(name: str, elapsed: float, failed: bool) -> None:
+    NODE_SECONDS.labels(name).observe(elapsed)
+    if failed:
+        NODE_ERRORS.labels(name).inc()
+    run = current_run()
+    if run is not None:
+        with run._lock:
+            run.nodes[name] = run.nodes.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def timed_step(name: str) -> Iterator[None]:
+    """Times a pipeline step run outside the graph; raising counts as failed"""
+    started = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        _observe_step(name, time.perf_counter() - started, failed)
+
+
+def instrument_node(name: str) -> Callable:
+    """
+    Times an async graph node (a function or method taking the state last); a node
+    that sets state["error"] counts as failed.
+    """
+    def decorate(node: Callable[..., Awaitable[dict]]) -> Callable[..., Awaitable[dict]]:
+        @functools.wraps(node)
+        async def timed(*args) -> dict:
+            state = args[-1]
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = await node(*args)
+                failed = bool(result.get("error")) and not state.get("error")
+                return result
+            finally:
+                _observe_step(name, time.perf_counter() - started, failed)
+        return timed
+    return decorate
+
+
+def record_llm_call(priority: str, outcome: str, seconds: float, queue_wait: float = 0.0,
+                    prompt_tokens: int = 0, response_tokens: int = 0) -> None:
+    """outcome is ok, error or replayed; replayed calls cost no time or tokens"""
+    LLM_SECONDS.labels(priority, outcome).observe(seconds)
+    if outcome != "replayed":
+        LLM_QUEUE_SECONDS.labels(priority).observe(queue_wait)
+    LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels("response").inc(response_tokens)
+    run = current_run()
+    if run is not None:
+        with run._lock:
+            run.llm_calls += 1
+            run.llm_replayed += outcome == "replayed"
+            run.llm_seconds += seconds
+            run.queue_wait_seconds += queue_wait
+            run.prompt_tokens += prompt_tokens
+            run.response_tokens += response_tokens
+
+
+def record_retry(reason: str) -> None:
+    LLM_RETRIES.labels(reason).inc()
+    run = current_run()
+    if run is not None:
+        with run._lock:
+            run.retries += 1
+
+
+def record_output(output_format: str, rows: int, nbytes: int) -> None:
+    OUTPUT_ROWS.labels(output_format).inc(rows)
+    OUTPUT_BYTES.labels(output_format).inc(nbytes)
+    run = current_run()
+    if run is not None:
+        with run._lock:
+            run.rows += rows
+            run.output_bytes += nbytes
+
+
+class RateLimiterCollector:
+    """Exports RateLimiter.stats() as gauges, read at scrape time"""
+
+    def __init__(self, stats: Callable[[], dict]):
+        self.stats = stats
+
+    def collect(self):
+        stats = self.stats()
+        in_flight = GaugeMetricFamily("synthgen_llm_in_flight", "Gemini calls currently admitted")
+        in_flight.add_metric([], stats["in_flight"])
+        yield in_flight
+        waiting = GaugeMetricFamily("synthgen_llm_waiting", "Gemini calls waiting on the rate limiter", labels=["lane"])
+        for lane, lane_stats in stats["lanes"].items():
+            waiting.add_metric([lane], lane_stats["waiting"])
+        yield waiting
+        for key, help_text in (("requests_available", "Requests left in the RPM bucket"),
+                               ("tokens_available", "Tokens left in the TPM bucket")):
+            if stats[key] is not None:
+                gauge = GaugeMetricFamily(f"synthgen_llm_{key}", help_text)
+                gauge.add_metric([], stats[key])
+                yield gauge
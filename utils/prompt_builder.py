@@ -0,0 +1,53 @@
+from models.schemas import FieldDefinition, Schema
+from utils.chunk_sizing import CHARS_PER_TOKEN
+
+MAX_SCENARIO_CHARS = 600
+MAX_DESCRIPTION_CHARS = 200
+
+
+def _squeeze(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def compact_field(field: FieldDefinition) -> str:
+    """One line per field: `- name (type): description; constraints; e.g. example`"""
+    parts = [_squeeze(field.description, MAX_DESCRIPTION_CHARS)] if field.description else []
+    if field.constraints:
+        parts.append(_squeeze(field.constraints, MAX_DESCRIPTION_CHARS))
+    if field.example:
+        parts.append(f"e.g. {_squeeze(field.example, 60)}")
+    return f"- {field.name} ({field.type.value}): {'; '.join(parts)}"
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN)
+
+
+class ChunkPrompt:
+    """
+    Generator prompt rendered once per run.
+
+    Everything that is the same for every chunk (instructions, scenario, one line per
+    field) goes into a static prefix; only the record count varies, at the very end.
+    Keeping the prefix byte-identical and first lets the provider's implicit prefix
+    caching apply across the chunks of a run.
+    """
+
+    def __init__(self, schema: Schema):
+        fields = "\n".join(compact_field(field) for field in schema.fields)
+        names = ", ".join(field.name for field in schema.fields)
+        self.prefix = (
+            "You generate realistic, domain-specific synthetic records as JSON.\n"
+            f"Scenario: {_squeeze(schema.scenario, MAX_SCENARIO_CHARS)}\n"
+            "Fields, as name (type): description; constraints:\n"
+            f"{fields}\n"
+            f"Rules: output only a JSON array of flat objects with exactly the keys {names}. "
+            "No missing or null values, no markdown or commentary. "
+            "Types: string, number, boolean (true/false), date (YYYY-MM-DD), datetime (ISO 8601). "
+            "Values must be realistic and consistent with the field descriptions and constraints.\n"
+        )
+        self.prefix_tokens = estimate_tokens(self.prefix)
+
+    def render(self, chunk_count: int) -> str:
+        return f"{self.prefix}Generate exactly {chunk_count} records."
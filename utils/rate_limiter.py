@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+LANES = ("interactive", "bulk")  # interactive (preview, cleaning, inference) always goes first
+BURST_SECONDS = 10  # buckets hold this many seconds of budget, so quota is spread over the minute
+POLL_SECONDS = 0.05  # re-check interval while blocked on concurrency or the other lane
+SLOW_WAIT_SECONDS = 1.0  # waits longer than this are logged
+
+
+class TokenBucket:
+    """Refills continuously at per_minute / 60 units per second, up to BURST_SECONDS of budget"""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * BURST_SECONDS / 60.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket instead of forever
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Permit:
+    """One admitted call; set used_tokens from the response to refund an over-estimate"""
+
+    def __init__(self, reserved_tokens: int, priority: str, waited: float = 0.0):
+        self.reserved_tokens = reserved_tokens
+        self.priority = priority
+        self.waited = waited  # seconds spent queued before admission
+        self.used_tokens: Optional[int] = None
+
+
+class RateLimiter:
+    """
+    Process-wide admission control for Gemini calls: a requests/minute bucket, a
+    tokens/minute bucket and a cap on calls in flight. Bulk calls hold back while
+    any interactive call is waiting.
+
+    Callers reserve prompt tokens plus max_output_tokens up front; the difference to
+    the tokens actually billed is refunded on release. Works from coroutines (alimit)
+    and threads (limit) alike.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None,
+                 max_concurrent: Optional[int] = None, history: int = 1000):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrent = max_concurrent or None
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._waiting: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._admitted: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._total_wait: Dict[str, float] = {lane: 0.0 for lane in LANES}
+        self._recent_waits: Dict[str, deque] = {lane: deque(maxlen=history) for lane in LANES}
+
+    def _try_acquire(self, tokens: int, priority: str) -> float:
+        """Admits the call and returns 0, or returns how long to wait before trying again"""
+        with self._lock:
+            if priority != "interactive" and self._waiting["interactive"]:
+                return POLL_SECONDS
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                return POLL_SECONDS
+            now = time.monotonic()
+            wait = max(
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+            )
+            if wait > 0:
+                return min(wait, 1.0)  # re-check: the other lane or a refund may change things
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def _enter(self, priority: str) -> None:
+        if priority not in LANES:
+            raise ValueError(f"Unknown priority lane: {priority}")
+        with self._lock:
+            self._waiting[priority] += 1
+
+    def _admitted_after(self, priority: str, started: float) -> None:
+        waited = time.monotonic() - started
+        with self._lock:
+            self._waiting[priority] -= 1
+            self._admitted[priority] += 1
+            self._total_wait[priority] += waited
+            self._recent_waits[priority].append(waited)
+        if waited > SLOW_WAIT_SECONDS:
+            logger.info(f"[RateLimiter] {priority} call waited {waited:.2f}s for quota")
+
+    def _abandon(self, priority: str) -> None:
+        with self._lock:
+            self._waiting[priority] -= 1
+
+    def release(self, permit: Permit) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if self.tokens and permit.used_tokens is not None and permit.used_tokens < permit.reserved_tokens:
+                self.tokens.give(permit.reserved_tokens - permit.used_tokens)
+
+    async def acquire(self, tokens: int, priority: str = "interactive") -> Permit:
+        self._enter(priority)
+        started = time.monotonic()
+        try:
+            while (wait := self._try_acquire(tokens, priority)) > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._abandon(priority)
+            raise
+        self._admitted_after(priority, started)
+        return Permit(tokens, priority, time.monotonic() - started)
+
+    def acquire_sync(self, tokens: int, priority: str = "interactive") -> Permit:
+        self._enter(priority)
+        started = time.monotonic()
+        try:
+            while (wait := self._try_acquire(tokens, priority)) > 0:
+                time.sleep(wait)
+        except BaseException:
+            self._abandon(priority)
+            raise
+        self._admitted_after(priority, started)
+        return Permit(tokens, priority, time.monotonic() - started)
+
+    @asynccontextmanager
+    async def alimit(self, tokens: int, priority: str = "interactive"):
+        permit = await self.acquire(tokens, priority)
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+
+    @contextmanager
+    def limit(self, tokens: int, priority: str = "interactive"):
+        permit = self.acquire_sync(tokens, priority)
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                recent = sorted(self._recent_waits[lane])
+                lanes[lane] = {
+                    "admitted": self._admitted[lane],
+                    "waiting": self._waiting[lane],
+                    "mean_wait_seconds": round(self._total_wait[lane] / self._admitted[lane], 4)
+                    if self._admitted[lane] else 0.0,
+                    "p95_wait_seconds": round(recent[int(0.95 * (len(recent) - 1))], 4) if recent else 0.0,
+                    "max_wait_seconds": round(recent[-1], 4) if recent else 0.0,
+                }
+            now = time.monotonic()
+            if self.requests:
+                self.requests._refill(now)
+            if self.tokens:
+                self.tokens._refill(now)
+            return {
+                "in_flight": self.in_flight,
+                "max_concurrent": self.max_concurrent,
+                "requests_available": round(self.requests.level, 1) if self.requests else None,
+                "tokens_available": round(self.tokens.level) if self.tokens else None,
+                "lanes": lanes,
+            }
+
+
+def build_rate_limiter() -> RateLimiter:
+    return RateLimiter(config.GEMINI_RPM, config.GEMINI_TPM, config.GEMINI_MAX_CONCURRENT)
+
+
+# Every GeminiModel call in the process goes through this one
+gemini_limiter = build_rate_limiter()
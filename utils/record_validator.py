@@ -0,0 +1,135 @@
+import logging
+import math
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Tuple
+from models.schemas import FieldType, Schema
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidValue(ValueError):
+    pass
+
+
+# A field check returns the (possibly coerced) value or raises InvalidValue
+FieldCheck = Callable[[Any], Any]
+
+_TRUE = {"true", "yes", "1"}
+_FALSE = {"false", "no", "0"}
+# "1,234,567.89": commas only as thousands separators; "1,5" is a decimal comma, not 15
+_GROUPED = re.compile(r"\s*[+-]?\d{1,3}(?:,\d{3})+(?:\.\d+)?\s*")
+
+
+def _check_string(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise InvalidValue(f"expected string, got {type(value).__name__}")
+
+
+def _check_number(value):
+    if isinstance(value, bool):
+        raise InvalidValue("expected number, got boolean")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise InvalidValue(f"expected finite number, got {value!r}")
+        return value
+    if isinstance(value, str):
+        if "," in value:
+            if not _GROUPED.fullmatch(value):
+                raise InvalidValue(f"expected number, got {value!r}")
+            value = value.replace(",", "")
+        try:
+            number = float(value)
+        except ValueError:
+            raise InvalidValue(f"expected number, got {value!r}")
+        if not math.isfinite(number):
+            raise InvalidValue(f"expected finite number, got {value!r}")
+        return int(number) if number.is_integer() and "." not in value else number
+    raise InvalidValue(f"expected number, got {type(value).__name__}")
+
+
+def _check_boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+    raise InvalidValue(f"expected boolean, got {value!r}")
+
+
+def _check_date(value):
+    if not isinstance(value, str):
+        raise InvalidValue(f"expected date string, got {type(value).__name__}")
+    try:
+        if len(value) == 10:
+            date.fromisoformat(value)
+            return value
+        return datetime.fromisoformat(value).date().isoformat()
+    except ValueError:
+        raise InvalidValue(f"invalid date {value!r}")
+
+
+def _check_datetime(value):
+    if not isinstance(value, str):
+        raise InvalidValue(f"expected datetime string, got {type(value).__name__}")
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidValue(f"invalid datetime {value!r}")
+    return value
+
+
+_CHECKS: Dict[FieldType, FieldCheck] = {
+    FieldType.STRING: _check_string,
+    FieldType.NUMBER: _check_number,
+    FieldType.BOOLEAN: _check_boolean,
+    FieldType.DATE: _check_date,
+    FieldType.DATETIME: _check_datetime,
+}
+
+
+class RecordValidator:
+    """
+    Per-record type validation compiled once per Schema.
+
+    Each field gets a precomputed check that accepts or coerces the value (numeric
+    strings, "true"/"false", datetime strings for date fields...). Records come out
+    restricted to the schema's fields, in schema order.
+    """
+
+    def __init__(self, schema: Schema):
+        self.checks: List[Tuple[str, FieldCheck]] = [(f.name, _CHECKS[f.type]) for f in schema.fields]
+
+    def validate(self, record: Any) -> dict:
+        if not isinstance(record, dict):
+            raise InvalidValue("record is not an object")
+        out = {}
+        for name, check in self.checks:
+            value = record.get(name)
+            if value is None:
+                raise InvalidValue(f"missing value for '{name}'")
+            try:
+                out[name] = check(value)
+            except InvalidValue as e:
+                raise InvalidValue(f"'{name}': {e}")
+        return out
+
+    def validate_batch(self, records: list) -> Tuple[List[dict], List[str]]:
+        """Returns the valid (coerced) records and a reason for each rejected one"""
+        valid, errors = [], []
+        for record in records:
+            try:
+                valid.append(self.validate(record))
+            except InvalidValue as e:
+                errors.append(str(e))
+        return valid, errors
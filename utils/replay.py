@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+from config import config
+from utils.cache import make_key
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"  # always call Gemini, store every response
+REPLAY = "replay"  # only stored responses; a miss fails the call, nothing goes over the network
+AUTO = "auto"  # replay what is stored, record the rest
+MODES = (RECORD, REPLAY, AUTO)
+
+
+class ReplayMissError(LookupError):
+    """A replay-only call whose prompt was never recorded"""
+
+
+class ResponseStore:
+    """
+    One JSON file per response under root, sharded by the first two hex digits of the
+    key. Plain files keep recordings diffable and easy to commit as test fixtures.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+
+class ReplayLayer:
+    """
+    Record/replay of Gemini responses keyed by a hash of everything that shapes the
+    reply: model, prompt, generation config and an optional caller tag.
+
+    The tag tells apart calls whose prompts are identical on purpose; the data
+    generator asks for "exactly N records" many times per run and tags each call with
+    its chunk offset and attempt.
+    """
+
+    def __init__(self, store: ResponseStore, mode: str = AUTO):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.store = store
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_name: str, prompt: str, generation_config: Dict[str, Any], tag: Optional[str] = None) -> str:
+        return make_key(model_name, prompt, generation_config, tag)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Stored response text, or None when the call should go to Gemini"""
+        if self.mode == RECORD:
+            return None
+        entry = self.store.get(key)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            return entry["response"]
+        if self.mode == REPLAY:
+            raise ReplayMissError(f"No recorded response for key {key} in {self.store.root}")
+        return None
+
+    def record(self, key: str, model_name: str, prompt: str, generation_config: Dict[str, Any],
+               tag: Optional[str], response: str) -> None:
+        self.store.put(key, {
+            "model": model_name,
+            "generation_config": generation_config,
+            "tag": tag,
+            "prompt": prompt,
+            "response": response,
+        })
+        with self._lock:
+            self.recorded += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+def build_replay() -> Optional[ReplayLayer]:
+    if not config.LLM_REPLAY_MODE:
+        return None
+    logger.info(f"[ReplayLayer] {config.LLM_REPLAY_MODE} mode, responses in {config.LLM_REPLAY_DIR}")
+    return ReplayLayer(ResponseStore(config.LLM_REPLAY_DIR), config.LLM_REPLAY_MODE)
+
+
+# Process-wide default installed on GeminiModel; None unless LLM_REPLAY_MODE is set
+llm_replay = build_replay()
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import random
+from typing import Any, Callable, Optional
+from google.api_core import exceptions as api_exceptions
+from google.generativeai.types import BlockedPromptException, StopCandidateException
+from config import config
+from utils.metrics import record_retry
+
+logger = logging.getLogger(__name__)
+
+THROTTLED = "throttled"  # 429 / quota: back off hard
+TRANSIENT = "transient"  # 5xx, timeouts, dropped connections: back off briefly
+BLOCKED = "blocked"      # safety / recitation block: the same prompt will be blocked again
+FATAL = "fatal"          # bad request, auth, anything unrecognized: retrying cannot help
+
+RETRYABLE = {THROTTLED, TRANSIENT}
+
+
+class BlockedResponseError(RuntimeError):
+    """Gemini answered but returned no text (prompt or candidate blocked)"""
+
+
+def classify(error: BaseException) -> str:
+    if isinstance(error, (BlockedResponseError, BlockedPromptException, StopCandidateException)):
+        return BLOCKED
+    if isinstance(error, (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)):
+        return THROTTLED
+    if isinstance(error, (api_exceptions.ServerError, api_exceptions.DeadlineExceeded, api_exceptions.Aborted,
+                          asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return TRANSIENT
+    return FATAL
+
+
+class RetryPolicy:
+    """
+    Retries the transport step of an LLM call: throttling and transient failures are
+    retried up to max_retries times with full-jitter exponential backoff, anything
+    else is re-raised at once. Parse failures of a successful reply are the caller's
+    to retry (with their own budget and no delay).
+    """
+
+    def __init__(self, max_retries: int = config.MAX_RETRIES, base_delay: float = config.RETRY_BASE_DELAY,
+                 throttle_delay: float = config.RETRY_THROTTLE_DELAY, max_delay: float = config.RETRY_MAX_DELAY,
+                 rng: Optional[random.Random] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.throttle_delay = throttle_delay
+        self.max_delay = max_delay
+        self._random = rng or random.Random()
+
+    def backoff(self, attempt: int, kind: str) -> float:
+        """Full jitter: uniform in [0, base * 2^attempt], capped at max_delay"""
+        base = self.throttle_delay if kind == THROTTLED else self.base_delay
+        return self._random.uniform(0, min(self.max_delay, base * 2 ** attempt))
+
+    def _next_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Delay before the next attempt, or None to give up"""
+        kind = classify(error)
+        if kind not in RETRYABLE or attempt >= self.max_retries:
+            return None
+        delay = self.backoff(attempt, kind)
+        record_retry(kind)
+        logger.warning(f"[Retry] {kind} error on attempt {attempt + 1}/{self.max_retries + 1}, "
+                       f"retrying in {delay:.2f}s: {error}")
+        return delay
+
+    async def acall(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -1,23 +1,54 @@
+import logging
 import socketio
+from pydantic import ValidationError
 from models.schemas import Schema
-from agents.HumanInteractionAgent import approval_registry, ApprovalResult
+from agents.HumanInteractionAgent import approval_registry, is_reviewer
 
+logger = logging.getLogger(__name__)
+
+# Mounted in front of the FastAPI app by main.create_app
 sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
-app = socketio.ASGIApp(sio)
+
+
+async def announce_approval(schema_id: str, schema: Schema) -> None:
+    """Tells connected reviewers a schema is waiting for them"""
+    await sio.emit("approval_requested", {"schema_id": schema_id, "schema": schema.model_dump(mode="json")})
+
+
+approval_registry.listeners.append(announce_approval)
+
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    # Connected clients receive every pending schema and may decide it: reviewers only
+    token = (auth or {}).get("token") or environ.get("HTTP_X_APPROVAL_TOKEN")
+    if not is_reviewer(token):
+        logger.warning(f"⚠️ Refused Socket.IO connection {sid}: no reviewer token")
+        raise socketio.exceptions.ConnectionRefusedError("reviewer token required")
+
+
+@sio.event
+async def pending_approvals(sid, data=None):
+    return [{**item, "schema": item["schema"].model_dump(mode="json")} for item in approval_registry.pending()]
+
 
 @sio.event
 async def submit_approval(sid, data):
     schema_id = data.get("schema_id")
     approved = data.get("approved", False)
 
-    if schema_id not in approval_registry:
-        print(f"⚠️ Unknown schema_id: {schema_id}")
-        return
-
-    schema = approval_registry[schema_id]["schema"]
-    approval_registry[schema_id]["response"] = ApprovalResult(
-        approved=approved,
-        schema_def=schema
-    )
-    approval_registry[schema_id]["event"].set()
-    print(f"📩 Approval received for schema_id={schema_id}: {approved}")
+    schema = None
+    if data.get("schema") is not None:
+        # Reviewers may send back an edited schema along with their decision
+        try:
+            schema = Schema.model_validate(data["schema"])
+        except ValidationError as e:
+            logger.warning(f"⚠️ Invalid edited schema for schema_id={schema_id}: {e}")
+            return {"ok": False, "error": "invalid schema"}
+
+    if not approval_registry.resolve(schema_id, approved, schema):
+        logger.warning(f"⚠️ Unknown or already decided schema_id: {schema_id}")
+        return {"ok": False, "error": "unknown schema_id"}
+
+    logger.info(f"📩 Approval received for schema_id={schema_id}: {approved}")
+    return {"ok": True}
@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from config import config
+from models.schemas import FieldDefinition
+
+logger = logging.getLogger(__name__)
+
+_UNIQUE_HINT = re.compile(r"\b(unique|distinct|primary key|no duplicates)\b", re.IGNORECASE)
+
+
+def unique_fields(fields: Iterable[FieldDefinition]) -> List[str]:
+    """Fields whose description or constraints ask for unique values"""
+    return [f.name for f in fields if _UNIQUE_HINT.search(f"{f.description or ''} {f.constraints or ''}")]
+
+
+def _normalize(value) -> str:
+    # "Alice@x.com" and "alice@x.com " count as the same key
+    return str(value).strip().casefold()
+
+
+class HashSetKeys:
+    """Exact membership over 64-bit hashes of the normalized values"""
+
+    def __init__(self):
+        self._hashes: Set[int] = set()
+
+    def __contains__(self, key: str) -> bool:
+        return hash(key) in self._hashes
+
+    def add(self, key: str) -> None:
+        self._hashes.add(hash(key))
+
+
+class BloomKeys:
+    """
+    Fixed-memory membership for very large runs. A false positive only means a
+    unique row is rejected and regenerated, never that a duplicate gets through.
+    """
+
+    def __init__(self, expected: int, false_positive_rate: float):
+        bits = max(64, int(-expected * math.log(false_positive_rate) / math.log(2) ** 2))
+        self._bits = bytearray((bits + 7) // 8)
+        self._size = bits
+        self._probes = max(1, round(bits / expected * math.log(2)))
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._probes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self._bits[p >> 3] |= 1 << (p & 7)
+
+
+class UniquenessIndex:
+    """
+    In-run index of unique-constrained column values and whole rows.
+
+    admit() checks and registers a record in O(1): a record repeating a value of a
+    unique column, or an entire earlier row, is rejected so the caller can ask for a
+    replacement. Hash sets are exact; above bloom_above expected rows Bloom filters
+    keep memory fixed.
+
+    Unique columns are enforced strictly. Whole-row checks are best effort: when
+    duplicate rows keep coming (a schema with few, low-cardinality fields simply has
+    few distinct rows) they are switched off for the rest of the run.
+    """
+    row_tolerance = 0.25  # duplicate rows per admitted row before row checks are given up
+    row_tolerance_min = 20
+
+    def __init__(self, fields: List[FieldDefinition], expected_rows: int, check_rows: bool = True,
+                 bloom_above: int = config.UNIQUE_INDEX_BLOOM_ABOVE,
+                 false_positive_rate: float = config.UNIQUE_INDEX_FALSE_POSITIVE_RATE):
+        def keys():
+            return BloomKeys(expected_rows, false_positive_rate) if expected_rows > bloom_above else HashSetKeys()
+
+        self.fields = [f.name for f in fields]
+        self.columns: Dict[str, Union[HashSetKeys, BloomKeys]] = {name: keys() for name in unique_fields(fields)}
+        self.rows = keys() if check_rows else None
+        self.admitted = 0
+        self.rejected = 0
+        self.duplicate_rows = 0
+
+    def _row_key(self, record: dict) -> str:
+        return "\x1f".join(_normalize(record.get(name)) for name in self.fields)
+
+    def admit(self, record: dict) -> Optional[str]:
+        """Registers the record, or returns why it conflicts (and registers nothing)"""
+        # Check every key before adding any, so a rejected record doesn't claim values
+        values = {name: _normalize(record.get(name)) for name in self.columns}
+        for name, value in values.items():
+            if value in self.columns[name]:
+                self.rejected += 1
+                return f"duplicate value for unique field '{name}'"
+        row = self._row_key(record) if self.rows is not None else None
+        if row is not None and row in self.rows:
+            self.duplicate_rows += 1
+            if self.duplicate_rows <= max(self.row_tolerance_min, self.row_tolerance * self.admitted):
+                self.rejected += 1
+                return "duplicate row"
+            logger.warning(f"[UniquenessIndex] {self.duplicate_rows} duplicate rows so far; "
+                           f"the schema has too few distinct rows, no longer rejecting them")
+            self.rows = None
+        for name, value in values.items():
+            self.columns[name].add(value)
+        if self.rows is not None:
+            self.rows.add(row)
+        self.admitted += 1
+        return None
+
+    def register(self, records: Iterable[dict]) -> None:
+        """Indexes records accepted earlier (e.g. resumed from a checkpoint) without checking them"""
+        for record in records:
+            for name, keys in self.columns.items():
+                keys.add(_normalize(record.get(name)))
+            if self.rows is not None:
+                self.rows.add(self._row_key(record))
+            self.admitted += 1
+
+    def filter(self, records: List[dict]) -> Tuple[List[dict], List[str]]:
+        """Returns the admitted records and the reason for each rejected one"""
+        admitted, conflicts = [], []
+        for record in records:
+            reason = self.admit(record)
+            if reason is None:
+                admitted.append(record)
+            else:
+                conflicts.append(reason)
+        return admitted, conflicts
@@ -0,0 +1,236 @@
+import re
+import logging
+import zlib
+from typing import Callable, Dict, List, Optional, Union
+import numpy as np
+from models.schemas import FieldDefinition, FieldType, Schema
+from utils.uniqueness import unique_fields
+
+logger = logging.getLogger(__name__)
+
+# A column generator takes a seeded RNG and a row count and returns that many JSON-ready values
+ColumnGenerator = Callable[[np.random.Generator, int], list]
+
+_NUM = r"(-?\d+(?:\.\d+)?)"
+_RANGE_PATTERNS = [
+    re.compile(rf"between\s+{_NUM}\s+and\s+{_NUM}", re.IGNORECASE),
+    re.compile(rf"from\s+{_NUM}\s+to\s+{_NUM}", re.IGNORECASE),
+    # Bare "X to Y" / "X..Y" / "X–Y", standing alone; a plain hyphen is left out since
+    # "555-0100" or "2020-01" are formats, not ranges
+    re.compile(rf"(?<![\w.-]){_NUM}\s*(?:to|–|\.\.)\s*{_NUM}(?![\w.-])", re.IGNORECASE),
+]
+_MIN_PATTERN = re.compile(rf"(?:>=|≥|min(?:imum)?\s*(?:of|:|=)?)\s*{_NUM}", re.IGNORECASE)
+_MAX_PATTERN = re.compile(rf"(?:<=|≤|max(?:imum)?\s*(?:of|:|=)?)\s*{_NUM}", re.IGNORECASE)
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?)?")
+_INTEGER_HINT = re.compile(r"\b(integer|whole|int)\b", re.IGNORECASE)
+_FLOAT_HINT = re.compile(r"\b(decimals?|float(ing)?|fraction(al)?|probability|proportion|ratio)\b", re.IGNORECASE)
+_UUID_HINT = re.compile(r"\buuid\b", re.IGNORECASE)
+
+
+def _numeric_range(text: str) -> Optional[tuple]:
+    for pattern in _RANGE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1), match.group(2)
+    low, high = _MIN_PATTERN.search(text), _MAX_PATTERN.search(text)
+    if low and high:
+        return low.group(1), high.group(1)
+    return None
+
+
+def _decimals(token: str) -> int:
+    return len(token.split(".")[1]) if "." in token else 0
+
+
+def _is_integer(low_token: str, high_token: str, hints: str) -> bool:
+    """Whole-number bounds mean an integer column unless the field says otherwise"""
+    if _INTEGER_HINT.search(hints):
+        return True
+    if _decimals(low_token) or _decimals(high_token) or _FLOAT_HINT.search(hints):
+        return False
+    # 0..1 is a share (discount, probability), not a coin flip
+    return sorted((float(low_token), float(high_token))) != [0.0, 1.0]
+
+
+def _places(low_token: str, high_token: str) -> int:
+    # A fraction between whole bounds ("probability between 0 and 1") gets two decimals
+    return max(_decimals(low_token), _decimals(high_token)) or 2
+
+
+def _number_column(low_token: str, high_token: str, integer: bool) -> Optional[ColumnGenerator]:
+    low, high = sorted((float(low_token), float(high_token)))
+    if integer:
+        low, high = int(np.ceil(low)), int(np.floor(high))
+        if low > high:
+            return None  # no whole number in the range; leave the column to the LLM
+        return lambda rng, n: rng.integers(low, high, size=n, endpoint=True).tolist()
+    places = _places(low_token, high_token)
+    return lambda rng, n: np.round(rng.uniform(low, high, size=n), places).tolist()
+
+
+def _temporal_bounds(start: str, end: str, unit: str) -> tuple:
+    low, high = sorted((np.datetime64(start.replace(" ", "T"), unit), np.datetime64(end.replace(" ", "T"), unit)))
+    return low, int((high - low).astype(np.int64))
+
+
+def _temporal_column(start: str, end: str, unit: str) -> ColumnGenerator:
+    low, span = _temporal_bounds(start, end, unit)
+
+    def column(rng: np.random.Generator, n: int) -> list:
+        values = low + rng.integers(0, span, size=n, endpoint=True).astype(f"timedelta64[{unit}]")
+        return np.datetime_as_string(values, unit=unit).tolist()
+
+    return column
+
+
+def _uuid_column(rng: np.random.Generator, n: int) -> list:
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    out = []
+    for row in raw:
+        h = row.tobytes().hex()
+        out.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return out
+
+
+def _boolean_column(rng: np.random.Generator, n: int) -> list:
+    return (rng.random(n) < 0.5).tolist()
+
+
+class UniqueRange:
+    """
+    Distinct values for a unique-constrained range. Row i gets grid point perm(i) of
+    the range, where perm is a seeded Feistel permutation of [0, size) (cycle-walked
+    down from the next power of four), so chunks stay distinct without shared state
+    and a row's value depends only on the seed and its offset.
+    """
+    rounds = 4
+
+    def __init__(self, size: int, to_values: Callable[[np.ndarray], list]):
+        self.size = size
+        self._half_bits = max(1, (max(size - 1, 1).bit_length() + 1) // 2)
+        self._mask = np.uint64((1 << self._half_bits) - 1)
+        self._to_values = to_values
+
+    def _permute(self, keys: np.ndarray, x: np.ndarray) -> np.ndarray:
+        shift = np.uint64(self._half_bits)
+        left, right = x >> shift, x & self._mask
+        for key in keys:
+            # splitmix64-style mixing as the round function
+            f = (right ^ key) * np.uint64(0x9E3779B97F4A7C15)
+            f ^= f >> np.uint64(29)
+            f *= np.uint64(0xBF58476D1CE4E5B9)
+            f ^= f >> np.uint64(32)
+            left, right = right, left ^ (f & self._mask)
+        return (left << shift) | right
+
+    def take(self, seed: int, name: str, start: int, count: int) -> list:
+        """Values for rows [start, start + count); start + count must not exceed size"""
+        keys = np.random.default_rng([seed, zlib.crc32(name.encode())]).integers(
+            0, 2 ** 63, size=self.rounds, dtype=np.uint64)
+        values = self._permute(keys, np.arange(start, start + count, dtype=np.uint64))
+        outside = values >= self.size
+        while outside.any():
+            values[outside] = self._permute(keys, values[outside])
+            outside = values >= self.size
+        return self._to_values(values.astype(np.int64))
+
+
+def _unique_number(low_token: str, high_token: str, integer: bool) -> Optional[UniqueRange]:
+    low, high = sorted((float(low_token), float(high_token)))
+    if integer:
+        low, high = int(np.ceil(low)), int(np.floor(high))
+        if low > high:
+            return None
+        return UniqueRange(high - low + 1, lambda steps: (low + steps).tolist())
+    places = _places(low_token, high_token)
+    scale = 10 ** places
+    first = int(np.ceil(low * scale))
+    return UniqueRange(int(np.floor(high * scale)) - first + 1,
+                       lambda steps: np.round((first + steps) / scale, places).tolist())
+
+
+def _unique_temporal(start: str, end: str, unit: str) -> UniqueRange:
+    low, span = _temporal_bounds(start, end, unit)
+    return UniqueRange(span + 1, lambda steps: np.datetime_as_string(
+        low + steps.astype(f"timedelta64[{unit}]"), unit=unit).tolist())
+
+
+def compile_unique_column(field: FieldDefinition) -> Optional[UniqueRange]:
+    """Distinct-valued generator for a unique ranged number/date field, or None"""
+    constraints = field.constraints or ""
+    if field.type == FieldType.NUMBER:
+        bounds = _numeric_range(constraints)
+        hints = f"{constraints} {field.description or ''}"
+        return _unique_number(*bounds, integer=_is_integer(*bounds, hints)) if bounds else None
+    if field.type in (FieldType.DATE, FieldType.DATETIME):
+        found = _DATE_PATTERN.findall(constraints)
+        if len(found) < 2:
+            return None
+        return _unique_temporal(found[0], found[1], "D" if field.type == FieldType.DATE else "s")
+    return None
+
+
+def compile_column(field: FieldDefinition) -> Optional[ColumnGenerator]:
+    """Returns a local generator for the field, or None if it needs the LLM"""
+    constraints = field.constraints or ""
+    hints = f"{constraints} {field.description or ''}"
+
+    if field.type == FieldType.BOOLEAN:
+        return _boolean_column
+
+    if field.type == FieldType.STRING:
+        return _uuid_column if _UUID_HINT.search(hints) else None
+
+    if field.type == FieldType.NUMBER:
+        bounds = _numeric_range(constraints)
+        return _number_column(*bounds, integer=_is_integer(*bounds, hints)) if bounds else None
+
+    if field.type in (FieldType.DATE, FieldType.DATETIME):
+        found = _DATE_PATTERN.findall(constraints)
+        if len(found) < 2:
+            return None
+        unit = "D" if field.type == FieldType.DATE else "s"
+        return _temporal_column(found[0], found[1], unit)
+
+    return None
+
+
+class LocalValueSynthesizer:
+    """
+    Fills schema columns that don't need a model: booleans, UUIDs, and numbers/dates
+    whose constraints give an explicit range. Everything else is left to the LLM.
+
+    Columns are generated vectorized per chunk from an RNG seeded by (seed, offset),
+    so a seeded run is reproducible regardless of the order chunks finish in. Ranged
+    columns that must be unique draw without replacement (UniqueRange) instead.
+    """
+
+    def __init__(self, schema: Schema, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 63))
+        self.columns: Dict[str, Union[ColumnGenerator, UniqueRange]] = {}
+        self.llm_fields: List[FieldDefinition] = []
+        unique = set(unique_fields(schema.fields))
+        for field in schema.fields:
+            column = compile_column(field)
+            if field.name in unique and field.type != FieldType.BOOLEAN and column is not _uuid_column:
+                column = compile_unique_column(field)
+                if column is not None and column.size < schema.sample_size:
+                    raise ValueError(f"Unique field '{field.name}' has only {column.size} distinct values "
+                                     f"in its range, fewer than sample_size {schema.sample_size}")
+            if column is None:
+                self.llm_fields.append(field)
+            else:
+                self.columns[field.name] = column
+
+        if self.columns:
+            logger.info(f"[LocalSynth] Local columns: {list(self.columns)}; LLM columns: {[f.name for f in self.llm_fields]}")
+
+    def generate(self, start: int, count: int) -> Dict[str, list]:
+        """Column-wise values for rows [start, start + count)"""
+        rng = np.random.default_rng([self.seed, start])
+        return {
+            name: column.take(self.seed, name, start, count) if isinstance(column, UniqueRange) else column(rng, count)
+            for name, column in self.columns.items()
+        }